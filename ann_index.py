@@ -0,0 +1,298 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from scoring import SCORE_BLOCK_ROWS, ResumeMatrix, normalize_rows, top_k_indices
+
+# Backends accepted by make_ann_index
+ANN_BACKENDS = ("exact", "ivf", "hnsw")
+
+
+class ExactIndex:
+    """Brute-force cosine search in NumPy; the reference every ANN backend is measured against.
+
+    It holds no vectors of its own: ``update`` records which keys it covers
+    and ``search`` scores the rows of the corpus ``ResumeMatrix`` it is given,
+    which every worker shares through a memory map.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def update(self, keys: List[str], vectors: Callable[[np.ndarray], np.ndarray]) -> bool:
+        """Cover every key of a corpus, returning True if the index changed.
+
+        ``vectors`` returns the normalised rows of ``keys`` at the given positions.
+        """
+        with self._lock:
+            missing = np.array([i for i, key in enumerate(keys) if key not in self._positions], dtype=np.intp)
+            if not len(missing) and not self._needs_training(len(keys)):
+                return False
+            self._update(keys, missing, vectors)
+            return True
+
+    def _needs_training(self, size: int) -> bool:
+        return False
+
+    def _update(self, keys: List[str], missing: np.ndarray, vectors: Callable[[np.ndarray], np.ndarray]) -> None:
+        self._append([keys[i] for i in missing])
+
+    def _append(self, keys: List[str]) -> None:
+        for key in keys:
+            self._positions[key] = len(self.keys)
+            self.keys.append(key)
+
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        return None
+
+    def search(self, query: np.ndarray, k: int, matrix: ResumeMatrix, rows_by_key: Dict[str, int]) -> List[Tuple[str, float]]:
+        """Return up to k ``(key, cosine_similarity)`` pairs from ``matrix``, best first.
+
+        ``rows_by_key`` maps content hashes to rows of ``matrix``; indexed keys
+        that are no longer in it are skipped.
+        """
+        with self._lock:
+            candidates = self._candidates(normalize_rows(query.reshape(1, -1))[0])
+            if candidates is not None:
+                keys = [self.keys[i] for i in candidates]
+        rows = None
+        if candidates is not None:
+            rows = np.unique(np.array([rows_by_key[key] for key in keys if key in rows_by_key], dtype=np.intp))
+
+        scores = matrix.similarities(query, rows)
+        best = top_k_indices(scores, k)
+        found = best if rows is None else rows[best]
+        return [(matrix.ids[row], float(scores[i])) for i, row in zip(best, found)]
+
+    def save(self, path: Path) -> None:
+        """Write the index to ``path`` atomically."""
+        tmp_path = Path(f"{path}.tmp")
+        with self._lock, open(tmp_path, "wb") as f:
+            np.savez(f, keys=np.array(self.keys), **self._state())
+        os.replace(tmp_path, path)
+
+    def _state(self) -> dict:
+        return {}
+
+    def load(self, path: Path) -> None:
+        with np.load(path) as data, self._lock:
+            self.keys = []
+            self._positions = {}
+            self._append([str(key) for key in data["keys"]])
+            self._restore(data)
+
+    def _restore(self, data) -> None:
+        pass
+
+
+class IVFIndex(ExactIndex):
+    """Inverted-file ANN index built in NumPy.
+
+    Vectors are clustered with spherical k-means into ``nlist`` cells; a
+    query is compared only against the rows in its ``nprobe`` closest
+    cells. Only the centroids and each key's cell are kept. New keys are
+    assigned to their nearest existing cell, and the cells are retrained on
+    the whole corpus (dropping keys that left it) once it has grown
+    ``retrain_factor`` times since the last training. Below
+    ``min_train_size`` keys it searches exactly.
+    """
+
+    def __init__(self, dim: int, nprobe: int = 8, min_train_size: int = 1024, retrain_factor: float = 4.0):
+        super().__init__(dim)
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_factor = retrain_factor
+        self.centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._cells: List[np.ndarray] = []
+        self._trained_size = 0
+
+    def _needs_training(self, size: int) -> bool:
+        return size >= self.min_train_size and (self.centroids is None or size >= self.retrain_factor * self._trained_size)
+
+    def _update(self, keys: List[str], missing: np.ndarray, vectors: Callable[[np.ndarray], np.ndarray]) -> None:
+        if self._needs_training(len(keys)):
+            self._train(keys, vectors)
+            return
+        if self.centroids is not None and len(missing):
+            self._assignments = np.concatenate([self._assignments, self._assign(vectors(missing))])
+        self._append([keys[i] for i in missing])
+        if self.centroids is not None:
+            self._build_cells()
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _train(self, keys: List[str], vectors: Callable[[np.ndarray], np.ndarray], iterations: int = 10, seed: int = 0) -> None:
+        size = len(keys)
+        nlist = max(1, int(np.sqrt(size)))
+        rng = np.random.default_rng(seed)
+
+        # Train on a sample so the cost is bounded for very large corpora
+        sample = vectors(np.sort(rng.choice(size, min(size, 64 * nlist), replace=False)))
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalize_rows(sums)
+
+        self.centroids = centroids
+        # Assign in blocks so a reduced-precision corpus is never upcast whole
+        self._assignments = np.concatenate([
+            self._assign(vectors(np.arange(start, min(start + SCORE_BLOCK_ROWS, size))))
+            for start in range(0, size, SCORE_BLOCK_ROWS)
+        ])
+        self.keys = []
+        self._positions = {}
+        self._append(list(keys))
+        self._trained_size = size
+        self._build_cells()
+
+    def _build_cells(self) -> None:
+        order = np.argsort(self._assignments, kind="stable")
+        bounds = np.searchsorted(self._assignments[order], np.arange(len(self.centroids) + 1))
+        self._cells = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        if self.centroids is None:
+            return None
+        probes = top_k_indices(self.centroids @ query, self.nprobe)
+        return np.concatenate([self._cells[i] for i in probes])
+
+    def _state(self) -> dict:
+        if self.centroids is None:
+            return {}
+        return {"centroids": self.centroids, "assignments": self._assignments, "trained_size": self._trained_size}
+
+    def _restore(self, data) -> None:
+        # Restore the trained cells instead of retraining on load
+        if "centroids" not in data:
+            self.centroids = None
+            self._assignments = np.zeros(0, dtype=np.int32)
+            self._cells = []
+            self._trained_size = 0
+            return
+        self.centroids = data["centroids"]
+        self._trained_size = int(data["trained_size"])
+        self._assignments = data["assignments"]
+        self._build_cells()
+
+
+class HNSWIndex:
+    """HNSW graph index backed by the optional ``hnswlib`` package.
+
+    Unlike the NumPy indexes, the graph holds its own copy of every vector.
+    """
+
+    def __init__(self, dim: int, m: int = 16, ef_construction: int = 200, ef: int = 128):
+        import hnswlib
+
+        self.dim = dim
+        self.ef = ef
+        self.keys: List[str] = []
+        self._positions = {}
+        self._lock = threading.RLock()
+        self._index = hnswlib.Index(space="cosine", dim=dim)
+        self._index.init_index(max_elements=1024, M=m, ef_construction=ef_construction, allow_replace_deleted=False)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def update(self, keys: List[str], vectors: Callable[[np.ndarray], np.ndarray]) -> bool:
+        """Insert the keys of a corpus the graph lacks, returning True if it changed.
+
+        ``vectors`` returns the normalised rows of ``keys`` at the given positions.
+        """
+        with self._lock:
+            missing = np.array([i for i, key in enumerate(keys) if key not in self._positions], dtype=np.intp)
+            if not len(missing):
+                return False
+
+            needed = len(self.keys) + len(missing)
+            if needed > self._index.get_max_elements():
+                self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+
+            labels = np.arange(len(self.keys), needed)
+            self._index.add_items(np.asarray(vectors(missing), dtype=np.float32), labels)
+            for i in missing:
+                self._positions[keys[i]] = len(self.keys)
+                self.keys.append(keys[i])
+            return True
+
+    def search(
+        self, query: np.ndarray, k: int, matrix: Optional[ResumeMatrix] = None, rows_by_key: Optional[Dict[str, int]] = None
+    ) -> List[Tuple[str, float]]:
+        """Return up to k ``(key, cosine_similarity)`` pairs, best first; the graph's own vectors are searched."""
+        with self._lock:
+            k = min(k, len(self.keys))
+            if k == 0:
+                return []
+            self._index.set_ef(max(self.ef, k))
+            labels, distances = self._index.knn_query(query.reshape(1, -1).astype(np.float32), k=k)
+        return [(self.keys[label], 1.0 - float(distance)) for label, distance in zip(labels[0], distances[0])]
+
+    def save(self, path: Path) -> None:
+        """Write the graph and its key table to ``path`` atomically."""
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            self._index.save_index(tmp_path)
+            with open(f"{tmp_path}.keys", "w") as f:
+                json.dump(self.keys, f)
+        os.replace(f"{tmp_path}.keys", f"{path}.keys")
+        os.replace(tmp_path, path)
+
+    def load(self, path: Path) -> None:
+        import hnswlib
+
+        with open(f"{path}.keys") as f:
+            keys = json.load(f)
+        self._index = hnswlib.Index(space="cosine", dim=self.dim)
+        self._index.load_index(str(path), max_elements=max(1024, len(keys)))
+        self.keys = keys
+        self._positions = {key: i for i, key in enumerate(keys)}
+
+
+def make_ann_index(backend: str, dim: int, directory: Optional[Path] = None):
+    """Create an ANN index for a backend name, loading any copy saved in ``directory``.
+
+    ``hnsw`` needs the optional ``hnswlib`` package and falls back to the
+    NumPy ``ivf`` index when it is not installed. The returned index has a
+    ``path`` attribute (None without a directory) for ``save``.
+    """
+    if backend not in ANN_BACKENDS:
+        raise ValueError(f"Unknown ANN backend {backend!r}, expected one of {ANN_BACKENDS}")
+
+    if backend == "hnsw":
+        try:
+            index = HNSWIndex(dim)
+        except ImportError:
+            print("Warning: hnswlib is not installed, falling back to the NumPy IVF index")
+            backend = "ivf"
+    if backend == "ivf":
+        index = IVFIndex(dim)
+    elif backend == "exact":
+        index = ExactIndex(dim)
+
+    index.path = Path(directory) / f"ann-{backend}.bin" if directory is not None else None
+    if index.path is not None and index.path.exists():
+        index.load(index.path)
+    return index
@@ -0,0 +1,126 @@
+"""Recall and latency of the ANN backends against exact cosine similarity.
+
+Usage:
+    python benchmark_ann.py --size 100000 --queries 200 --k 20
+    python benchmark_ann.py --store .resume_index/bert-base-uncased-mean-overlap64
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from ann_index import ANN_BACKENDS, make_ann_index
+from embedding_store import EmbeddingStore
+from scoring import ResumeMatrix
+
+
+def synthetic_vectors(size: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Clustered random vectors; resume embeddings cluster by role, so uniform noise would be unrealistic."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size)
+    return (centers[labels] + 0.5 * rng.normal(size=(size, dim))).astype(np.float32)
+
+
+def store_vectors(store_dir: Path) -> np.ndarray:
+    """Load every distinct embedding from an embedding store directory."""
+    store = EmbeddingStore(store_dir)
+    vectors = []
+    for path in sorted(Path(store_dir).glob("*.npz")):
+        # Reading through the store dequantizes int8 vectors; duplicates share their canonical's vector
+        entry = store.get(path.stem)
+        if entry is not None and store.canonical(path.stem) == path.stem:
+            vectors.append(entry[1])
+    return np.stack(vectors).astype(np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    """Baseline: the same sklearn cosine_similarity calculate_similarity uses, over the whole corpus."""
+    scores = cosine_similarity(query.reshape(1, -1), vectors)[0]
+    return np.argsort(-scores)[:k]
+
+
+def percentile_ms(samples, q: float) -> float:
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, k: int, backends) -> dict:
+    keys = [str(i) for i in range(len(vectors))]
+    # The NumPy backends search the corpus matrix the server ranks from
+    matrix = ResumeMatrix(keys, vectors)
+    rows_by_key = {key: i for i, key in enumerate(keys)}
+    report = {"size": len(vectors), "dim": vectors.shape[1], "queries": len(queries), "k": k, "backends": {}}
+
+    timings = []
+    truth = []
+    for query in queries:
+        start = time.perf_counter()
+        truth.append(set(exact_top_k(vectors, query, k).tolist()))
+        timings.append(time.perf_counter() - start)
+    report["backends"]["cosine_similarity"] = {
+        "recall": 1.0,
+        "p50_ms": percentile_ms(timings, 50),
+        "p95_ms": percentile_ms(timings, 95),
+    }
+
+    for backend in backends:
+        start = time.perf_counter()
+        index = make_ann_index(backend, vectors.shape[1])
+        # Grow the corpus in batches, the way the indexer feeds it during ingest
+        for batch_end in range(1000, len(vectors) + 1000, 1000):
+            index.update(keys[:batch_end], matrix.vectors)
+        build_seconds = time.perf_counter() - start
+
+        timings = []
+        recalls = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            hits = index.search(query, k, matrix, rows_by_key)
+            timings.append(time.perf_counter() - start)
+            recalls.append(len({int(key) for key, _ in hits} & expected) / k)
+
+        report["backends"][backend] = {
+            "index": type(index).__name__,
+            "build_seconds": round(build_seconds, 3),
+            "recall": round(float(np.mean(recalls)), 4),
+            "p50_ms": percentile_ms(timings, 50),
+            "p95_ms": percentile_ms(timings, 95),
+        }
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20000, help="synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--store", type=Path, help="benchmark real vectors from an embedding store directory")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--backends", nargs="+", default=list(ANN_BACKENDS), choices=ANN_BACKENDS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the report as JSON")
+    args = parser.parse_args()
+
+    if args.store:
+        vectors = store_vectors(args.store)
+    else:
+        vectors = synthetic_vectors(args.size, args.dim, args.clusters, args.seed)
+
+    # Queries are perturbed corpus vectors, like a job description close to some resumes
+    rng = np.random.default_rng(args.seed + 1)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)]
+    queries = queries + 0.3 * rng.normal(size=queries.shape).astype(np.float32) * queries.std()
+
+    report = run(vectors, queries, args.k, args.backends)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
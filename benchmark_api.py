@@ -0,0 +1,253 @@
+"""Load test for the ranking API: latency percentiles, throughput and stage timings.
+
+For every corpus size a synthetic corpus is generated with generate_resumes.py
+into its own work directory, a local uvicorn server is started there and
+/rank-resumes and /list-resumes are driven at each concurrency level.
+Corpora and their embedding stores are kept between runs, so only the
+first run of a size pays for encoding. With --url an already running
+server is benchmarked instead.
+
+Server-side stage timings are collected from the Server-Timing header,
+which the server returns for requests sent with X-Debug-Timing.
+
+Usage:
+    python benchmark_api.py --corpus-sizes 100 1000 --concurrency 1 8 32 --requests 200
+    python benchmark_api.py --url http://localhost:8001 --output bench.json --baseline previous.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+
+import generate_resumes
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# Stand-in job postings; each request picks one, so --query-pool controls how often the result cache hits
+JOB_POSTINGS = [
+    ("Backend Engineer", "Build and operate Python web services and REST APIs on AWS", "Python, FastAPI, AWS, PostgreSQL"),
+    ("Frontend Developer", "Develop responsive single-page applications", "JavaScript, React, TypeScript, CSS3"),
+    ("Data Scientist", "Train and deploy machine learning models on large datasets", "Python, SQL, Machine Learning, R"),
+    ("DevOps Engineer", "Automate infrastructure, CI/CD pipelines and monitoring", "Docker, Kubernetes, Terraform, Jenkins"),
+    ("Project Manager", "Lead cross-functional teams delivering software projects", "Project Management, Scrum, JIRA, Communication"),
+    ("Mobile Developer", "Ship native iOS and Android applications", "Swift, Kotlin, Firebase, Git"),
+]
+
+
+def generate_corpus(directory: Path, size: int, seed: int) -> float:
+    """Fill ``directory/resumes`` with ``size`` synthetic PDFs, returning the seconds spent."""
+    resume_dir = directory / "resumes"
+    resume_dir.mkdir(parents=True, exist_ok=True)
+    if len(list(resume_dir.glob("*.pdf"))) == size:
+        return 0.0
+
+    start = time.perf_counter()
+    generate_resumes.generate_corpus(size, resume_dir, seed)
+    return time.perf_counter() - start
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(directory: Path, workers: int, ready_timeout: float):
+    """Start uvicorn serving this repository's app from ``directory``; returns ``(process, url, seconds to ready)``."""
+    port = free_port()
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_DIR), os.getenv("PYTHONPATH")]))}
+    log = open(directory / "server.log", "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=directory, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < ready_timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}; see {directory / 'server.log'}")
+        try:
+            if requests.get(f"{url}/ready", timeout=5).status_code == 200:
+                return process, url, time.perf_counter() - start
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.5)
+
+    process.terminate()
+    raise RuntimeError(f"Server was not ready after {ready_timeout:.0f}s; see {directory / 'server.log'}")
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Parse ``stage;dur=12.3, other;dur=4`` into ``{stage: milliseconds}``."""
+    stages = {}
+    for metric in filter(None, (part.strip() for part in header.split(","))):
+        name, *params = metric.split(";")
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                stages[name.strip()] = float(value)
+    return stages
+
+
+def send(session: requests.Session, url: str, endpoint: str, rng: random.Random, query_pool: int, top_k: int):
+    """Send one request; returns ``(seconds, ok, server stage timings)``."""
+    start = time.perf_counter()
+    try:
+        if endpoint == "rank":
+            query = rng.randrange(query_pool)
+            title, description, skills = JOB_POSTINGS[query % len(JOB_POSTINGS)]
+            variant = query // len(JOB_POSTINGS)
+            data = {
+                "job_title": title,
+                # Distinct descriptions beyond the built-in postings defeat the result cache
+                "job_description": f"{description} (opening {variant})" if variant else description,
+                "required_skills": skills,
+                "top_k": top_k,
+            }
+            response = session.post(f"{url}/rank-resumes", data=data, headers={"X-Debug-Timing": "1"}, timeout=300)
+        else:
+            response = session.get(f"{url}/list-resumes", params={"limit": 100}, headers={"X-Debug-Timing": "1"}, timeout=300)
+        ok = response.status_code == 200
+        stages = parse_server_timing(response.headers.get("Server-Timing", ""))
+    except requests.RequestException:
+        ok, stages = False, {}
+    return time.perf_counter() - start, ok, stages
+
+
+def run_load(url: str, endpoint: str, concurrency: int, total: int, query_pool: int, top_k: int, seed: int) -> dict:
+    """Send ``total`` requests from ``concurrency`` threads and summarise them."""
+    def worker(index: int):
+        rng = random.Random(seed * 1000 + index)
+        count = total // concurrency + (1 if index < total % concurrency else 0)
+        with requests.Session() as session:
+            return [send(session, url, endpoint, rng, query_pool, top_k) for _ in range(count)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        samples = [sample for samples in pool.map(worker, range(concurrency)) for sample in samples]
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([seconds for seconds, ok, _ in samples if ok]) * 1000
+    stage_samples: Dict[str, List[float]] = {}
+    for _, ok, stages in samples:
+        for name, duration in stages.items():
+            stage_samples.setdefault(name, []).append(duration)
+
+    summary = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": sum(1 for _, ok, _ in samples if not ok),
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+    }
+    if len(latencies):
+        summary.update({
+            "mean_ms": round(float(latencies.mean()), 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        })
+    summary["stages_ms"] = {
+        name: {"mean": round(float(np.mean(values)), 3), "p95": round(float(np.percentile(values, 95)), 3)}
+        for name, values in sorted(stage_samples.items())
+    }
+    return summary
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict) -> List[str]:
+    """Describe the p95 and throughput change of every run also present in ``baseline``."""
+    previous = {(run["corpus_size"], run["endpoint"], run["concurrency"]): run for run in baseline["runs"]}
+    lines = []
+    for run in report["runs"]:
+        old = previous.get((run["corpus_size"], run["endpoint"], run["concurrency"]))
+        if old is None or "p95_ms" not in run or "p95_ms" not in old:
+            continue
+        p95 = (run["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+        rps = (run["requests_per_second"] - old["requests_per_second"]) / max(old["requests_per_second"], 1e-9) * 100
+        lines.append(
+            f"{run['endpoint']:>5} corpus={run['corpus_size']} c={run['concurrency']}: "
+            f"p95 {old['p95_ms']} -> {run['p95_ms']} ms ({p95:+.1f}%), "
+            f"rps {old['requests_per_second']} -> {run['requests_per_second']} ({rps:+.1f}%)"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="benchmark a running server instead of starting one per corpus size")
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[100])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint and concurrency level")
+    parser.add_argument("--endpoints", nargs="+", default=["rank", "list"], choices=["rank", "list"])
+    parser.add_argument("--query-pool", type=int, default=len(JOB_POSTINGS), help="distinct job descriptions to cycle")
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--workdir", type=Path, default=Path(".benchmark"), help="where corpora and their stores are kept")
+    parser.add_argument("--ready-timeout", type=float, default=3600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the report as JSON")
+    parser.add_argument("--baseline", type=Path, help="earlier --output report to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "runs": [],
+    }
+
+    targets = [(None, args.url)] if args.url else [(size, None) for size in args.corpus_sizes]
+    for size, url in targets:
+        process = None
+        setup = {}
+        if url is None:
+            directory = args.workdir.resolve() / f"corpus-{size}-seed{args.seed}"
+            setup["generate_seconds"] = round(generate_corpus(directory, size, args.seed), 3)
+            process, url, ready_seconds = start_server(directory, args.workers, args.ready_timeout)
+            setup["ready_seconds"] = round(ready_seconds, 3)
+        try:
+            for endpoint in args.endpoints:
+                for concurrency in args.concurrency:
+                    run = run_load(url, endpoint, concurrency, args.requests, args.query_pool, args.top_k, args.seed)
+                    run = {"corpus_size": size, **setup, **run}
+                    report["runs"].append(run)
+                    print(json.dumps(run), flush=True)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        for line in compare(report, json.loads(args.baseline.read_text())):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Throughput, memory and ranking agreement of reduced-precision inference.
+
+Encodes resumes from the Kaggle CSV with the full-precision model and with
+dynamic int8 quantisation, then ranks them with float32, float16 and int8
+stored vectors and compares every ranking against float32/float32.
+
+Usage:
+    python benchmark_precision.py --docs 200 --queries 20 --k 10
+    MODEL_NAME=/models/bert python benchmark_precision.py --threads 4 --output precision.json
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from scoring import VECTOR_DTYPES, ResumeMatrix, top_k_indices
+
+MODEL_PRECISIONS = ("float32", "int8")
+
+
+def load_texts(csv_path: Path, docs: int, queries: int, seed: int):
+    """Return ``(resumes, job_descriptions)`` sampled from the resume CSV."""
+    with open(csv_path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(rows))
+    resumes = [rows[i]["Resume"] for i in order[:docs]]
+
+    # Use other resumes, prefixed with their category, as stand-in job descriptions
+    picked = order[docs:docs + queries] if len(rows) > docs else order[:queries]
+    job_descriptions = [f"{rows[i]['Category']}. {rows[i]['Resume'][:1000]}" for i in picked]
+    return resumes, job_descriptions
+
+
+def peak_memory_mb() -> float:
+    """Peak resident set size of this process, or NaN where ``resource`` is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1)
+
+
+def encode_with(precision: str, model_name: str, resumes, job_descriptions, batch_size: int, threads: int, pooling):
+    """Encode everything with one model precision; runs in a fresh process so peak memory is its own."""
+    import torch
+
+    from encoder import encode_batch
+    from model_loader import LazyModel
+
+    torch.set_num_threads(threads)
+    tokenizer, model = LazyModel(model_name, quantize=precision == "int8").load()
+
+    # Warm up so one-off allocation and kernel selection are not timed
+    encode_batch(resumes[:batch_size], tokenizer, model, batch_size=batch_size, pooling=pooling)
+
+    start = time.perf_counter()
+    doc_embeddings = encode_batch(resumes, tokenizer, model, batch_size=batch_size, pooling=pooling)
+    seconds = time.perf_counter() - start
+    query_embeddings = encode_batch(job_descriptions, tokenizer, model, batch_size=batch_size, pooling=pooling)
+
+    stats = {"docs_per_second": round(len(resumes) / seconds, 2), "peak_memory_mb": peak_memory_mb()}
+    return stats, doc_embeddings, query_embeddings
+
+
+def rankings(doc_embeddings, query_embeddings, dtype: str, k: int):
+    matrix = ResumeMatrix([str(i) for i in range(len(doc_embeddings))], doc_embeddings, dtype)
+    scores = [matrix.similarities(query) for query in query_embeddings]
+    return matrix, scores, [top_k_indices(s, k) for s in scores]
+
+
+def run(args) -> dict:
+    resumes, job_descriptions = load_texts(args.csv, args.docs, args.queries, args.seed)
+    pooling = None if args.pooling == "none" else args.pooling
+    report = {"model": args.model, "docs": len(resumes), "queries": len(job_descriptions), "k": args.k, "modes": {}}
+
+    encoded = {}
+    context = multiprocessing.get_context("spawn")
+    for precision in MODEL_PRECISIONS:
+        with context.Pool(1) as pool:
+            encoded[precision] = pool.apply(
+                encode_with,
+                (precision, args.model, resumes, job_descriptions, args.batch_size, args.threads, pooling),
+            )
+
+    _, baseline_scores, baseline_top = rankings(*encoded["float32"][1:], "float32", args.k)
+    for precision in MODEL_PRECISIONS:
+        stats, doc_embeddings, query_embeddings = encoded[precision]
+        for dtype in VECTOR_DTYPES:
+            matrix, scores, top = rankings(doc_embeddings, query_embeddings, dtype, args.k)
+            overlap = [len(set(a.tolist()) & set(b.tolist())) / args.k for a, b in zip(top, baseline_top)]
+            score_error = [np.abs(a - b).max() for a, b in zip(scores, baseline_scores)]
+            report["modes"][f"{precision}/{dtype}"] = {
+                **stats,
+                "matrix_bytes": int(matrix.matrix.nbytes + (0 if matrix.scales is None else matrix.scales.nbytes)),
+                "top_k_agreement": round(float(np.mean(overlap)), 4),
+                "top_1_agreement": round(float(np.mean([a[0] == b[0] for a, b in zip(top, baseline_top)])), 4),
+                "max_similarity_error": round(float(np.max(score_error)), 5),
+            }
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.getenv("MODEL_NAME", "bert-base-uncased"))
+    parser.add_argument("--csv", type=Path, default=Path("UpdatedResumeDataSet.csv"))
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="torch intra-op threads")
+    parser.add_argument("--pooling", default="mean", choices=("mean", "max", "none"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
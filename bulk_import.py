@@ -0,0 +1,190 @@
+"""Bulk-import resume texts from a CSV or JSONL file into the embedding store.
+
+Rows are streamed, encoded in batches with the server's model settings and
+written straight into the store, so large text corpora can be ranked
+without rendering them to PDF first. Each row's category is kept as
+filterable metadata. Re-running an interrupted import skips the rows it
+already finished. Rows that repeat or nearly repeat a text already in the
+corpus share its vector instead of being encoded again.
+
+Usage:
+    python bulk_import.py UpdatedResumeDataSet.csv
+    python bulk_import.py resumes.jsonl --text-field text --category-field label
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from dedup import NearDuplicateIndex
+from embedding_store import EmbeddingStore, ImportManifest, content_hash
+
+# Where imported rows appear in listings and results, e.g. imported/UpdatedResumeDataSet-3f9a2c1b-12.txt
+IMPORTED_DIR = Path("imported")
+
+
+def source_id(source: Path) -> str:
+    """Return a short hash of a source file's absolute path.
+
+    It is part of every imported row's name, so sources with the same file
+    name in different directories never collide.
+    """
+    return hashlib.sha256(str(source.resolve()).encode("utf-8")).hexdigest()[:8]
+
+
+def read_records(source: Path) -> Iterator[dict]:
+    """Yield the records of a CSV (with a header row) or JSON Lines file one at a time."""
+    if source.suffix.lower() in (".jsonl", ".ndjson"):
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    # Resume texts can be far longer than the csv module's default field limit
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+    with open(source, encoding="utf-8", newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def import_records(
+    source: Path,
+    store: EmbeddingStore,
+    encode: Callable[[List[str]], np.ndarray],
+    batch_size: int = 16,
+    text_field: str = "Resume",
+    category_field: Optional[str] = "Category",
+    on_batch: Optional[Callable[[Dict[str, int]], None]] = None,
+    near_duplicates: Optional[NearDuplicateIndex] = None,
+) -> Dict[str, int]:
+    """Stream ``source`` into ``store``, returning counts of imported, skipped and empty rows.
+
+    At most ``batch_size`` texts are held in memory at once. Rows are
+    recorded in the store's ``ImportManifest`` only after their vectors are
+    stored, so a rerun after an interruption resumes after the last
+    completed batch. Texts already in the store are recorded without being
+    re-encoded, and so are texts that ``near_duplicates`` matches to an
+    encoded resume; those are stored as its duplicates.
+    """
+    source = Path(source)
+    prefix = f"{source.stem}-{source_id(source)}"
+    manifest = ImportManifest(store.root)
+    done = {entry["file"] for entry in manifest.entries()}
+    counts = {"imported": 0, "skipped": 0, "empty": 0, "duplicates": 0}
+    pending: List[Tuple[dict, str]] = []
+    duplicates: List[Tuple[dict, str, str]] = []
+    stored: List[dict] = []
+
+    def flush():
+        if pending:
+            embeddings = encode([text for _, text in pending])
+            for (entry, text), embedding in zip(pending, embeddings):
+                store.put(entry["key"], text, embedding)
+                stored.append(entry)
+            pending.clear()
+        for entry, text, canonical in duplicates:
+            store.put_duplicate(entry["key"], text, canonical)
+            stored.append(entry)
+        counts["duplicates"] += len(duplicates)
+        duplicates.clear()
+        manifest.append(stored)
+        counts["imported"] += len(stored)
+        stored.clear()
+        if on_batch is not None:
+            on_batch(counts)
+
+    for row, record in enumerate(read_records(source)):
+        file = str(IMPORTED_DIR / f"{prefix}-{row}.txt")
+        if file in done:
+            counts["skipped"] += 1
+            continue
+
+        text = (record.get(text_field) or "").strip()
+        if not text:
+            counts["empty"] += 1
+            continue
+
+        key = content_hash(text.encode("utf-8"))
+        entry = {
+            "file": file,
+            "key": key,
+            "category": (record.get(category_field) or None) if category_field else None,
+            "source": source.name,
+            "row": row,
+        }
+        # Duplicate texts share one store entry and are only encoded once
+        queued_keys = [queued["key"] for queued, _ in pending] + [queued["key"] for queued, _, _ in duplicates]
+        if key in store or key in queued_keys:
+            stored.append(entry)
+            counts["duplicates"] += 1
+        else:
+            canonical = None
+            if near_duplicates is not None:
+                canonical = near_duplicates.find(text, {queued["key"]: queued_text for queued, queued_text in pending})
+                if canonical is None:
+                    near_duplicates.add(key, text)
+            if canonical is None:
+                pending.append((entry, text))
+            else:
+                duplicates.append((entry, text, canonical))
+        if len(pending) + len(duplicates) + len(stored) >= batch_size:
+            flush()
+
+    flush()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", type=Path, help="CSV or JSONL file")
+    parser.add_argument("--text-field", default="Resume")
+    parser.add_argument("--category-field", default="Category", help="empty to import without categories")
+    parser.add_argument("--batch-size", type=int, help="texts per encoding batch (default: ENCODE_BATCH_SIZE)")
+    parser.add_argument("--threads", type=int, help="torch threads for encoding (default: one per CPU)")
+    args = parser.parse_args()
+
+    # Use the server's model, pooling and store settings so the vectors match what it ranks
+    import server
+    import torch
+
+    # The server splits the cores between its ranking workers; the importer runs alone
+    torch.set_num_threads(args.threads or os.cpu_count() or 1)
+
+    start = time.perf_counter()
+
+    def report(counts):
+        rate = counts["imported"] / max(time.perf_counter() - start, 1e-9)
+        print(
+            f"imported {counts['imported']} rows ({rate:.1f}/s), {counts['duplicates']} duplicates, skipped {counts['skipped']}",
+            flush=True,
+        )
+
+    # Match near-duplicates against everything already indexed as well as this import
+    near_duplicates = server.near_duplicates
+    published = server.matrix_file.load()
+    if near_duplicates is not None and published is not None:
+        for key in published[2]:
+            near_duplicates.add(key, server.store.text(key) or "")
+
+    counts = import_records(
+        args.source,
+        server.store,
+        server.encode_texts,
+        batch_size=args.batch_size or server.ENCODE_BATCH_SIZE,
+        text_field=args.text_field,
+        category_field=args.category_field or None,
+        on_batch=report,
+        near_duplicates=near_duplicates,
+    )
+    print(json.dumps({"source": str(args.source), "store": str(server.STORE_DIR), **counts}))
+
+
+if __name__ == "__main__":
+    main()
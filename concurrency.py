@@ -0,0 +1,107 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable
+
+
+class QueueFullError(Exception):
+    """Raised when a bounded pool already has as much work as it will accept."""
+
+
+class BoundedExecutor:
+    """Run blocking work on a fixed-size thread pool with a bounded wait queue.
+
+    At most ``max_workers`` jobs run at once; up to ``max_queue`` more wait in
+    FIFO order. Anything beyond that is rejected with ``QueueFullError`` instead
+    of piling up behind the event loop.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str = "worker"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs currently running or waiting."""
+        return self._pending
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on the pool without blocking the event loop."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise QueueFullError(f"{self._pending} jobs already pending")
+            self._pending += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            # Carry the caller's context variables (e.g. per-request timings) into the worker thread
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, functools.partial(context.run, fn, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def stream(self, fn: Callable, *args, max_buffered: int = 8, **kwargs) -> AsyncIterator:
+        """Run the generator function ``fn(*args, **kwargs)`` on the pool, yielding its items.
+
+        At most ``max_buffered`` items wait for the consumer, so a slow client
+        pauses the generator rather than letting output pile up in memory. If
+        the consumer stops early the generator is closed.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise QueueFullError(f"{self._pending} jobs already pending")
+            self._pending += 1
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=max_buffered)
+        stopped = threading.Event()
+        finished = object()
+
+        def put(item):
+            # Block this worker thread, not the event loop, until the consumer has room
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def produce():
+            generator = None
+            try:
+                generator = fn(*args, **kwargs)
+                for item in generator:
+                    if stopped.is_set():
+                        return
+                    put((item, None))
+                put((finished, None))
+            except Exception as e:
+                if not stopped.is_set():
+                    put((finished, e))
+            finally:
+                if generator is not None:
+                    generator.close()
+
+        def release(_):
+            with self._lock:
+                self._pending -= 1
+
+        future = loop.run_in_executor(self._executor, contextvars.copy_context().run, produce)
+        future.add_done_callback(release)
+        try:
+            while True:
+                item, error = await queue.get()
+                if error is not None:
+                    raise error
+                if item is finished:
+                    return
+                yield item
+        finally:
+            stopped.set()
+            # Unblock a producer waiting on a full queue so it can see the stop flag
+            while not queue.empty():
+                queue.get_nowait()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,118 @@
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+from skills import tokenize
+
+# Words per shingle; resumes are compared as sets of these word sequences
+SHINGLE_SIZE = 3
+
+# MinHash signature length, split into LSH bands of equal size. With 16 bands
+# of 8 rows, pairs with a Jaccard similarity of 0.8 become candidates ~95% of
+# the time (at 0.95, virtually always) and unrelated resumes (below 0.4)
+# almost never do.
+NUM_PERMUTATIONS = 128
+NUM_BANDS = 16
+
+# Permutations are hash functions (a * x + b) mod a Mersenne prime; the
+# parameters are fixed so signatures are the same in every process
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, _PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Return the distinct runs of ``size`` consecutive tokens in a text."""
+    tokens = tokenize(text)
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Return the Jaccard similarity of two shingle sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(shingle_set: Set[str]) -> np.ndarray:
+    """Return the MinHash signature of a non-empty shingle set."""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingle_set),
+        dtype=np.uint64,
+        count=len(shingle_set),
+    ) % _PRIME
+    return ((hashes[:, None] * _A + _B) % _PRIME).min(axis=0)
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index for finding resumes that are near-copies of one already stored.
+
+    Only canonical resumes (those that were encoded) are added. A lookup
+    collects the resumes sharing at least one LSH band with the new text and
+    confirms each with the exact Jaccard similarity of their shingles, read
+    through ``text``; only the band hashes of each key are held in memory.
+    Resumes that leave the corpus are dropped with ``retain`` so nothing is
+    matched against a deleted file or the old version of an edited one.
+    """
+
+    def __init__(self, text: Callable[[str], Optional[str]], threshold: float = 0.95):
+        self.text = text
+        self.threshold = threshold
+        self._buckets: List[Dict[int, Set[str]]] = [{} for _ in range(NUM_BANDS)]
+        self._bands_of: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._bands_of
+
+    def __len__(self) -> int:
+        return len(self._bands_of)
+
+    @staticmethod
+    def _bands(signature: np.ndarray) -> List[int]:
+        return [hash(band.tobytes()) for band in np.split(signature, NUM_BANDS)]
+
+    def add(self, key: str, text: str) -> None:
+        """Index the text of a canonical resume."""
+        shingle_set = shingles(text)
+        if not shingle_set or key in self._bands_of:
+            return
+        bands = self._bands(minhash(shingle_set))
+        with self._lock:
+            self._bands_of[key] = bands
+            for buckets, band in zip(self._buckets, bands):
+                buckets.setdefault(band, set()).add(key)
+
+    def retain(self, keys: Set[str]) -> None:
+        """Drop every indexed resume whose key is not in ``keys``."""
+        with self._lock:
+            for key in [key for key in self._bands_of if key not in keys]:
+                for buckets, band in zip(self._buckets, self._bands_of.pop(key)):
+                    buckets[band].discard(key)
+                    if not buckets[band]:
+                        del buckets[band]
+
+    def find(self, text: str, unstored: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """Return the key of the most similar indexed resume at or above the threshold, or None.
+
+        ``unstored`` maps keys added but not yet written to the store to their text.
+        """
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return None
+        bands = self._bands(minhash(shingle_set))
+        with self._lock:
+            candidates = set().union(*(buckets.get(band, ()) for buckets, band in zip(self._buckets, bands)))
+
+        best, best_similarity = None, self.threshold
+        for key in sorted(candidates):
+            other = unstored[key] if unstored and key in unstored else self.text(key)
+            similarity = jaccard(shingle_set, shingles(other)) if other is not None else 0.0
+            if similarity >= best_similarity:
+                best, best_similarity = key, similarity
+        return best
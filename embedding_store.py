@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import timed
+from scoring import dequantize_rows, quantize_rows
+
+
+def content_hash(data: bytes) -> str:
+    """Return the SHA-256 hex digest of a file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class EmbeddingStore:
+    """On-disk store of extracted resume text and [CLS] vectors, keyed by content hash.
+
+    Each entry lives in its own ``<hash>.npz`` file, so a resume is only
+    re-extracted and re-encoded when its bytes (and therefore its hash) change.
+    Only the text is cached in memory, for the ``text_cache_size`` most
+    recently used entries (0 for no limit); the corpus vectors are served
+    from the shared ``MatrixFile`` instead of a per-process copy. Vectors are written
+    in ``dtype`` ("float32", "float16" or "int8") and read back as float32.
+    A near-duplicate is stored with its own text but no vector; it names the
+    canonical entry whose vector it shares.
+    """
+
+    def __init__(self, root: Path, dtype: str = "float32", text_cache_size: int = 10000):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.dtype = dtype
+        self.text_cache_size = text_cache_size
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+        self._canonical: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.npz"
+
+    def _remember(self, key: str, text: str) -> None:
+        # Called with the lock held; evicts the least recently used texts
+        self._texts[key] = text
+        self._texts.move_to_end(key)
+        while self.text_cache_size > 0 and len(self._texts) > self.text_cache_size:
+            self._texts.popitem(last=False)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._texts or self._path(key).exists()
+
+    def get(self, key: str) -> Optional[Tuple[str, np.ndarray]]:
+        """Return ``(text, embedding)`` for a content hash, or None if missing."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        with timed("store_read"), np.load(path) as data:
+            text = str(data["text"])
+            canonical = str(data["duplicate_of"]) if "duplicate_of" in data else key
+            if canonical == key:
+                scale = data["scale"] if "scale" in data else None
+                embedding = dequantize_rows(data["embedding"], scale)
+        with self._lock:
+            self._remember(key, text)
+            self._canonical[key] = canonical
+        if canonical != key:
+            canonical_entry = self.get(canonical)
+            if canonical_entry is None:
+                return None
+            embedding = canonical_entry[1]
+        return text, embedding
+
+    def canonical(self, key: str) -> str:
+        """Return the key of the entry holding the vector for a content hash (itself unless a duplicate)."""
+        if key not in self._canonical:
+            self.get(key)
+        return self._canonical.get(key, key)
+
+    def failure(self, key: str) -> Optional[str]:
+        """Return the recorded extraction error for a content hash, if any."""
+        try:
+            return self.root.joinpath(f"{key}.failed").read_text()
+        except FileNotFoundError:
+            return None
+
+    def mark_failed(self, key: str, error: str) -> None:
+        """Record that a content hash could not be ingested, so it is not retried until it changes."""
+        self.root.joinpath(f"{key}.failed").write_text(error)
+
+    def remove(self, keys: Iterable[str]) -> None:
+        """Delete the entries and failure markers of content hashes that are no longer needed."""
+        with self._lock:
+            for key in keys:
+                for path in (self._path(key), self.root / f"{key}.failed"):
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+                self._texts.pop(key, None)
+                self._canonical.pop(key, None)
+
+    def text(self, key: str) -> Optional[str]:
+        """Return the extracted text for a content hash, or None if missing."""
+        with self._lock:
+            text = self._texts.get(key)
+            if text is not None:
+                self._texts.move_to_end(key)
+                return text
+        entry = self.get(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: str, text: str, embedding: np.ndarray) -> None:
+        """Persist the text and embedding for a content hash."""
+        path = self._path(key)
+        tmp_path = path.with_name(f"{key}.tmp")
+
+        data, scale = quantize_rows(embedding, self.dtype)
+        arrays = {"embedding": data} if scale is None else {"embedding": data, "scale": scale}
+
+        # Write to a temporary file first so a crash never leaves a partial entry
+        with self._lock:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, text=np.array(text), **arrays)
+            os.replace(tmp_path, path)
+
+            self._remember(key, text)
+            self._canonical[key] = key
+
+    def put_duplicate(self, key: str, text: str, canonical: str) -> None:
+        """Persist the text of a near-duplicate that shares the vector of ``canonical``."""
+        path = self._path(key)
+        tmp_path = path.with_name(f"{key}.tmp")
+        canonical = self.canonical(canonical)
+
+        with self._lock:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, text=np.array(text), duplicate_of=np.array(canonical))
+            os.replace(tmp_path, path)
+
+            self._remember(key, text)
+            self._canonical[key] = canonical
+
+
+class MatrixFile:
+    """Corpus embedding matrix in a flat ``.npy`` file shared between processes.
+
+    Every uvicorn worker opens the current matrix with ``numpy.memmap``, so the
+    OS page cache holds one copy however many workers there are. A small
+    ``matrix.json`` pointer names the current matrix and id table; writers
+    fill new files and then atomically replace the pointer, so readers see
+    either the old matrix or the new one, never a half-written one. An int8
+    matrix is published with its per-row scales in a ``.scales.npy`` file.
+    The id table lists, for each row, every ``(file, content hash)`` pair
+    collapsed into it as duplicates.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.pointer = self.root / "matrix.json"
+
+    def version(self) -> Optional[int]:
+        """Return the version of the current matrix, or None if none was written."""
+        try:
+            with open(self.pointer) as f:
+                return json.load(f)["version"]
+        except FileNotFoundError:
+            return None
+
+    def write(
+        self,
+        version: int,
+        files: List[str],
+        keys: List[str],
+        matrix: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+        members: Optional[List[List[Tuple[str, str]]]] = None,
+    ) -> None:
+        """Publish a new matrix and its id table, then remove the files it replaces."""
+        try:
+            with open(self.pointer) as f:
+                old = json.load(f)
+        except FileNotFoundError:
+            old = None
+
+        name = f"matrix-{version}-{uuid.uuid4().hex[:8]}"
+        np.save(self.root / f"{name}.npy", np.asarray(matrix))
+        if scales is not None:
+            np.save(self.root / f"{name}.scales.npy", np.asarray(scales, dtype=np.float32))
+        with open(self.root / f"{name}.ids.json", "w") as f:
+            json.dump({"files": files, "keys": keys, "scaled": scales is not None, "members": members}, f)
+
+        tmp_pointer = self.pointer.with_name(f"matrix.json.{name}.tmp")
+        with open(tmp_pointer, "w") as f:
+            json.dump({"version": version, "name": name}, f)
+        os.replace(tmp_pointer, self.pointer)
+
+        # Readers keep their mapping after the unlink on POSIX; elsewhere the old files are left behind
+        if old is not None:
+            for suffix in (".npy", ".scales.npy", ".ids.json"):
+                try:
+                    (self.root / f"{old['name']}{suffix}").unlink()
+                except OSError:
+                    pass
+
+    def load(self) -> Optional[Tuple[int, List[str], List[str], np.ndarray, Optional[np.ndarray], List[List[Tuple[str, str]]]]]:
+        """Return ``(version, files, keys, matrix, scales, members)`` with the matrix memory-mapped read-only."""
+        # The pointer can be swapped between reading it and opening its files; retry on the new one
+        for _ in range(3):
+            try:
+                with open(self.pointer) as f:
+                    current = json.load(f)
+                with open(self.root / f"{current['name']}.ids.json") as f:
+                    ids = json.load(f)
+                # Older NumPy cannot map an empty file, and an empty matrix costs nothing to load
+                matrix = np.load(self.root / f"{current['name']}.npy", mmap_mode="r" if ids["keys"] else None)
+                scales = np.load(self.root / f"{current['name']}.scales.npy") if ids.get("scaled") else None
+            except FileNotFoundError:
+                if not self.pointer.exists():
+                    return None
+                continue
+            # Matrices written before duplicates were collapsed have one file per row
+            members = ids.get("members") or [[(file, key)] for file, key in zip(ids["files"], ids["keys"])]
+            return current["version"], ids["files"], ids["keys"], matrix, scales, [[tuple(m) for m in row] for row in members]
+        return None
+
+
+class ImportManifest:
+    """Append-only JSONL log of documents bulk-imported into an embedding store.
+
+    Each line is ``{"file", "key", "category", "source", "row"}``; ``file``
+    is a pseudo path naming the imported row, and ``key`` is the store entry
+    holding its text and vector. Lines are only appended after the entry is
+    stored, so every listed key can be ranked. Readers follow the file
+    incrementally with ``read_new``.
+    """
+
+    def __init__(self, root: Path):
+        self.path = Path(root) / "imported.jsonl"
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def append(self, entries: List[dict]) -> None:
+        if not entries:
+            return
+        lines = "".join(json.dumps(entry) + "\n" for entry in entries)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def entries(self) -> List[dict]:
+        """Return every entry in the manifest."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.endswith("\n")]
+        except FileNotFoundError:
+            return []
+
+    def read_new(self) -> List[dict]:
+        """Return the entries appended since the previous call."""
+        with self._lock:
+            try:
+                with open(self.path, "rb") as f:
+                    # A file shorter than what was read has been replaced; start over
+                    if os.fstat(f.fileno()).st_size < self._offset:
+                        self._offset = 0
+                    f.seek(self._offset)
+                    data = f.read()
+            except FileNotFoundError:
+                return []
+
+            # A line still being written is picked up on the next call
+            complete = data[:data.rfind(b"\n") + 1]
+            self._offset += len(complete)
+            return [json.loads(line) for line in complete.decode("utf-8").splitlines() if line]
@@ -0,0 +1,80 @@
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+from metrics import INFERENCE_BATCH_SIZE, timed
+
+# Ways to combine per-window embeddings of a long text into one vector
+POOLING_MODES = ("mean", "max")
+
+
+def encode_batch(
+    texts: List[str],
+    tokenizer,
+    model,
+    batch_size: int = 16,
+    max_length: int = 512,
+    pooling: Optional[str] = None,
+    chunk_overlap: int = 64,
+) -> np.ndarray:
+    """Encode many texts into an (N, hidden_size) matrix of [CLS] embeddings.
+
+    Texts are sorted by token length before batching so each batch is padded
+    only to the length of its longest member. Rows of the returned matrix are
+    in the same order as ``texts``.
+
+    With ``pooling=None`` anything past ``max_length`` tokens is truncated.
+    With ``pooling="mean"`` or ``"max"`` long texts are split into windows of
+    ``max_length`` tokens overlapping by ``chunk_overlap``; every window of
+    every text goes through the same batches and the window embeddings of
+    each text are pooled into its row.
+    """
+    hidden_size = model.config.hidden_size
+    if not texts:
+        return np.zeros((0, hidden_size), dtype=np.float32)
+    if pooling is not None and pooling not in POOLING_MODES:
+        raise ValueError(f"Unknown pooling mode {pooling!r}, expected one of {POOLING_MODES}")
+
+    # Tokenize once without padding; padding is applied per batch below
+    with timed("tokenize"):
+        if pooling is None:
+            encoded = tokenizer(list(texts), truncation=True, max_length=max_length)
+            owners = np.arange(len(texts))
+        else:
+            encoded = tokenizer(
+                list(texts),
+                truncation=True,
+                max_length=max_length,
+                stride=chunk_overlap,
+                return_overflowing_tokens=True,
+            )
+            owners = np.asarray(encoded.pop("overflow_to_sample_mapping"))
+
+    input_ids = encoded["input_ids"]
+    order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+
+    window_embeddings = np.empty((len(input_ids), hidden_size), dtype=np.float32)
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start:start + batch_size]
+        with timed("pad"):
+            features = [{key: encoded[key][i] for key in encoded.keys()} for i in batch_idx]
+            inputs = tokenizer.pad(features, padding=True, return_tensors="pt")
+
+        # inference_mode also skips autograd's version counters, unlike no_grad
+        INFERENCE_BATCH_SIZE.observe(len(batch_idx))
+        with timed("inference"), torch.inference_mode():
+            outputs = model(**inputs)
+
+        # Use the [CLS] token embedding as the text embedding
+        window_embeddings[batch_idx] = outputs.last_hidden_state[:, 0, :].numpy()
+
+    if pooling is None:
+        return window_embeddings
+
+    # Pool each text's windows into a single document vector
+    embeddings = np.empty((len(texts), hidden_size), dtype=np.float32)
+    for i in range(len(texts)):
+        windows = window_embeddings[owners == i]
+        embeddings[i] = windows.mean(axis=0) if pooling == "mean" else windows.max(axis=0)
+    return embeddings
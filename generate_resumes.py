@@ -1,7 +1,23 @@
+"""Generate a synthetic resume corpus for demos and scale testing.
+
+Resumes are generated across a process pool. Every resume is drawn from its
+own random stream derived from the seed and its index, so a seed always
+produces the same corpus whatever the number of workers. Besides PDFs the
+corpus can be written as plain-text files or as one JSONL file (readable by
+bulk_import.py), which skips PDF rendering for fast ingest benchmarks.
+
+Usage:
+    python generate_resumes.py
+    python generate_resumes.py --count 100000 --seed 7 --format jsonl --output-dir corpus
+"""
+import argparse
+import json
 import random
+from concurrent.futures import ProcessPoolExecutor
 from fpdf import FPDF
 import os
-from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
 
 # Data for random generation
 first_names = [
@@ -71,39 +87,42 @@ non_technical_skills = [
     "Documentation", "Training & Mentoring", "Cross-functional Collaboration"
 ]
 
-def generate_phone():
-    return f"({random.randint(100,999)}) {random.randint(100,999)}-{random.randint(1000,9999)}"
+def generate_phone(rng=random):
+    return f"({rng.randint(100,999)}) {rng.randint(100,999)}-{rng.randint(1000,9999)}"
 
-def generate_email(first_name, last_name):
+def generate_email(first_name, last_name, rng=random):
     domains = ["gmail.com", "yahoo.com", "outlook.com", "hotmail.com"]
-    return f"{first_name.lower()}.{last_name.lower()}@{random.choice(domains)}"
+    return f"{first_name.lower()}.{last_name.lower()}@{rng.choice(domains)}"
 
-def generate_experience_years():
-    return random.randint(1, 15)
+def generate_experience_years(rng=random):
+    return rng.randint(1, 15)
 
-def generate_skills():
+def generate_skills(rng=random):
     skills = []
     # Add random technical skills from each category
     for category, category_skills in technical_skills.items():
-        num_skills = random.randint(2, min(5, len(category_skills)))
-        skills.extend(random.sample(category_skills, num_skills))
+        num_skills = rng.randint(2, min(5, len(category_skills)))
+        skills.extend(rng.sample(category_skills, num_skills))
     
     # Add random non-technical skills
-    num_soft_skills = random.randint(3, 6)
-    skills.extend(random.sample(non_technical_skills, num_soft_skills))
+    num_soft_skills = rng.randint(3, 6)
+    skills.extend(rng.sample(non_technical_skills, num_soft_skills))
     
     return skills
 
-def generate_resume():
-    first_name = random.choice(first_names)
-    last_name = random.choice(last_names)
-    major = random.choice(majors)
-    years_experience = generate_experience_years()
-    current_year = datetime.now().year
+# Year the generated careers run up to; fixed so a seed gives the same corpus in any year
+REFERENCE_YEAR = 2024
+
+def generate_resume_record(rng=random, current_year: int = REFERENCE_YEAR) -> dict:
+    """Generate one resume as ``{"name", "category", "text"}``; the category is the candidate's major."""
+    first_name = rng.choice(first_names)
+    last_name = rng.choice(last_names)
+    major = rng.choice(majors)
+    years_experience = generate_experience_years(rng)
     
     resume = f"{first_name.upper()} {last_name.upper()}\n"
     resume += f"{major} Professional\n"
-    resume += f"{generate_email(first_name, last_name)} | {generate_phone()}\n\n"
+    resume += f"{generate_email(first_name, last_name, rng)} | {generate_phone(rng)}\n\n"
     
     resume += "SUMMARY\n"
     resume += f"Experienced {major} professional with {years_experience}+ years of expertise in "
@@ -111,22 +130,21 @@ def generate_resume():
     resume += f"and team leadership.\n\n"
     
     resume += "SKILLS\n"
-    skills = generate_skills()
+    skills = generate_skills(rng)
     skills_grouped = [skills[i:i+3] for i in range(0, len(skills), 3)]
     for skill_group in skills_grouped:
         resume += "• " + ", ".join(skill_group) + "\n"
     resume += "\n"
     
     resume += "EXPERIENCE\n\n"
-    num_positions = min(years_experience, random.randint(1, 3))
-    current_year = datetime.now().year
+    num_positions = min(years_experience, rng.randint(1, 3))
     year = current_year
     
     for i in range(num_positions):
-        company = random.choice(companies)
-        duration = random.randint(1, 4)
+        company = rng.choice(companies)
+        duration = rng.randint(1, 4)
         position = f"Senior {major} " if i == 0 else f"{major} "
-        position += random.choice(["Specialist", "Professional", "Consultant", "Expert"])
+        position += rng.choice(["Specialist", "Professional", "Consultant", "Expert"])
         
         resume += f"{position} | {company} | {year-duration}-"
         resume += "Present\n" if i == 0 else f"{year}\n"
@@ -140,13 +158,13 @@ def generate_resume():
             "Mentored junior team members and conducted knowledge sharing sessions"
         ]
         for _ in range(3):
-            resume += f"- {random.choice(responsibilities)}\n"
+            resume += f"- {rng.choice(responsibilities)}\n"
         resume += "\n"
         year -= duration
     
     resume += "EDUCATION\n"
-    grad_year = current_year - years_experience - random.randint(0, 2)
-    university = random.choice([
+    grad_year = current_year - years_experience - rng.randint(0, 2)
+    university = rng.choice([
         "University of Technology", "State University", "National Institute of Technology",
         "Technical University", "International University", "Institute of Science"
     ])
@@ -155,14 +173,19 @@ def generate_resume():
     
     resume += "CERTIFICATIONS\n"
     certifications = [
-        f"{random.choice(['Advanced', 'Professional', 'Expert'])} {major} Certification",
-        f"{random.choice(technical_skills['Programming Languages'])} Developer Certification",
-        f"{random.choice(technical_skills['Cloud & DevOps'])} Professional"
+        f"{rng.choice(['Advanced', 'Professional', 'Expert'])} {major} Certification",
+        f"{rng.choice(technical_skills['Programming Languages'])} Developer Certification",
+        f"{rng.choice(technical_skills['Cloud & DevOps'])} Professional"
     ]
     for cert in certifications:
         resume += f"- {cert}\n"
     
-    return resume, f"{first_name}_{last_name}_resume"
+    return {"name": f"{first_name}_{last_name}_resume", "category": major, "text": resume}
+
+def generate_resume(rng=random):
+    """Generate one resume, returning ``(content, name)``."""
+    record = generate_resume_record(rng)
+    return record["text"], record["name"]
 
 def create_pdf(content, filename):
     pdf = FPDF()
@@ -192,14 +215,84 @@ def create_pdf(content, filename):
         except Exception as e:
             print(f"Error: Could not save PDF with alternative filename: {e}")
 
-# Create resumes directory if it doesn't exist
-os.makedirs("resumes", exist_ok=True)
+# Output formats: one PDF or text file per resume, or a single JSONL file
+FORMATS = ("pdf", "txt", "jsonl")
+
+def resume_rng(seed: int, index: int) -> random.Random:
+    """Return the random stream for resume ``index`` of the corpus generated from ``seed``."""
+    return random.Random(f"{seed}:{index}")
+
+def _generate_chunk(seed: int, start: int, end: int, output_dir: str, fmt: str, year: int) -> List[str]:
+    # Runs in a pool worker; file formats are written here, JSONL lines are returned in order
+    lines = []
+    for index in range(start, end):
+        record = generate_resume_record(resume_rng(seed, index), year)
+        # Generated names repeat, so the index keeps every file distinct
+        stem = f"{record['name']}_{index}"
+        if fmt == "pdf":
+            create_pdf(record["text"], os.path.join(output_dir, f"{stem}.pdf"))
+        elif fmt == "txt":
+            with open(os.path.join(output_dir, f"{stem}.txt"), "w", encoding="utf-8") as f:
+                f.write(record["text"])
+        else:
+            lines.append(json.dumps({"id": stem, "Category": record["category"], "Resume": record["text"]}))
+    return lines
+
+def generate_corpus(
+    count: int,
+    output_dir="resumes",
+    seed: int = 0,
+    fmt: str = "pdf",
+    workers: Optional[int] = None,
+    chunk_size: int = 100,
+    progress: bool = False,
+    year: int = REFERENCE_YEAR
+) -> Path:
+    """Generate ``count`` resumes into ``output_dir`` across a process pool.
+
+    Returns the directory for ``pdf``/``txt`` output and the written file
+    (``output_dir/resumes.jsonl``) for ``jsonl``, whose ``Resume`` and
+    ``Category`` fields are bulk_import.py's defaults.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    chunks = [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+    workers = min(workers or os.cpu_count() or 1, max(1, len(chunks)))
+
+    jsonl = open(output_dir / "resumes.jsonl", "w", encoding="utf-8") if fmt == "jsonl" else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_generate_chunk, seed, start, end, str(output_dir), fmt, year) for start, end in chunks]
+            # Collect in submission order so JSONL rows are always in index order
+            for (_, end), future in zip(chunks, futures):
+                lines = future.result()
+                if jsonl is not None:
+                    jsonl.writelines(line + "\n" for line in lines)
+                if progress:
+                    print(f"Generated resume {end}/{count}", flush=True)
+    finally:
+        if jsonl is not None:
+            jsonl.close()
+    return output_dir / "resumes.jsonl" if fmt == "jsonl" else output_dir
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100, help="number of resumes")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible corpus (default: random, printed)")
+    parser.add_argument("--output-dir", default="resumes")
+    parser.add_argument("--format", choices=FORMATS, default="pdf")
+    parser.add_argument("--workers", type=int, help="generator processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=100, help="resumes per pool task")
+    parser.add_argument("--year", type=int, default=REFERENCE_YEAR, help="year the generated careers run up to")
+    args = parser.parse_args()
 
-# Generate 100 resumes
-for i in range(100):
-    resume_content, resume_name = generate_resume()
-    pdf_path = f"resumes/{resume_name}.pdf"
-    create_pdf(resume_content, pdf_path)
-    print(f"Generated resume {i+1}/100: {pdf_path}")
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    output = generate_corpus(
+        args.count, args.output_dir, seed, args.format, args.workers, args.chunk_size, progress=True, year=args.year
+    )
+    print(f"\nGenerated {args.count} resumes in {output} (seed {seed})")
 
-print("\nAll resumes generated successfully!") 
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from dedup import NearDuplicateIndex
+from embedding_store import EmbeddingStore, ImportManifest, MatrixFile, content_hash
+from lexical import BM25Index, Vocabulary
+from metrics import timed
+from scoring import ResumeMatrix, normalize_rows, quantize_rows
+from skills import TokenIndex, token_set
+
+
+@dataclass
+class FileState:
+    """What the indexer last saw for one file."""
+    mtime: float
+    size: int
+    key: str
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """Immutable view of the indexed corpus used by a ranking request.
+
+    ``files[i]``, ``keys[i]`` and ``tokens[i]`` describe row ``i`` of
+    ``matrix``; ``token_index`` maps skill tokens back to rows and
+    ``rows_by_key`` maps content hashes back to rows. Duplicate resumes
+    share one row: ``members[i]`` lists every ``(file, content hash)`` of
+    row ``i``, starting with ``files[i]``. ``listing`` holds
+    ``(lowercase name, file name, row)`` for every file, sorted for paging
+    through the resumes by name. ``categories[i]`` is the category label of
+    a bulk-imported row (None for PDFs) and ``rows_by_category`` maps each
+    lowercase label to its sorted rows. ``lexical`` scores every row
+    against a free-text query with BM25. ``member_tokens[i]`` pairs each
+    distinct content hash of row ``i`` with its tokens, and ``tokens[i]``
+    is their union. ``version`` changes whenever a resume is added,
+    modified or deleted.
+    """
+    version: int
+    files: List[Path]
+    keys: List[str]
+    matrix: ResumeMatrix
+    tokens: List[FrozenSet[str]]
+    token_index: TokenIndex
+    rows_by_key: Dict[str, int]
+    listing: List[Tuple[str, str, int]]
+    categories: List[Optional[str]]
+    rows_by_category: Dict[str, np.ndarray]
+    members: List[List[Tuple[Path, str]]]
+    lexical: BM25Index
+    member_tokens: List[List[Tuple[str, FrozenSet[str]]]]
+
+
+class ResumeIndexer:
+    """Keeps the resume index in sync with a directory of PDFs.
+
+    Each scan stats every file and only hashes those whose mtime or size
+    changed; only added or modified content is handed to ``ingest``, and
+    deleted files simply drop out. Ranking requests read the latest
+    snapshot and never touch the filesystem themselves. If an ``ann`` index
+    is given, every indexed resume it lacks is inserted into it on each
+    scan, so it also fills up when enabled on an existing corpus. The writer
+    saves it before publishing a matrix, and readers load it again whenever
+    its file changes.
+    Documents bulk-imported into the store are indexed alongside the PDFs
+    under the pseudo paths listed in its ``ImportManifest``. Files whose
+    store entry is a duplicate of another are collapsed into that entry's
+    row; with ``near_duplicates``, the text of every row is added to it so
+    ingest can recognise near-copies of indexed resumes. After each scan the
+    writer deletes the store entries of deleted files and of the old content
+    of edited ones.
+
+    With a ``matrix_file``, one process (the holder of its writer lock) scans
+    and publishes the corpus matrix; every other process only maps the
+    latest published matrix, so uvicorn workers share a single copy. The
+    matrix is held in ``vector_dtype`` ("float32", "float16" or "int8").
+    """
+
+    def __init__(
+        self,
+        resume_dir: Path,
+        store: EmbeddingStore,
+        ingest: Callable[[Dict[str, Path]], Dict[str, str]],
+        hidden_size: int = 768,
+        poll_interval: float = 5.0,
+        ann=None,
+        matrix_file: Optional[MatrixFile] = None,
+        vector_dtype: str = "float32",
+        near_duplicates: Optional[NearDuplicateIndex] = None,
+    ):
+        self.resume_dir = Path(resume_dir)
+        self.store = store
+        self.ingest = ingest
+        self.hidden_size = hidden_size
+        self.poll_interval = poll_interval
+        self.ann = ann
+        self._ann_mtime: Optional[int] = None
+        self._referenced: Set[str] = set()
+        self.matrix_file = matrix_file
+        self.vector_dtype = vector_dtype
+        self.near_duplicates = near_duplicates
+
+        self._files: Dict[Path, FileState] = {}
+        self._tokens: Dict[str, FrozenSet[str]] = {}
+        self._terms: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.vocabulary = Vocabulary()
+        self.manifest = ImportManifest(store.root)
+        self._imported: Dict[Path, dict] = {}
+        self._snapshot = IndexSnapshot(
+            0, [], [], ResumeMatrix([], np.zeros((0, hidden_size))), [], TokenIndex([]), {}, [], [], {}, [],
+            BM25Index([], self.vocabulary), [],
+        )
+        self._scan_lock = threading.Lock()
+        self._writer_lock = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def snapshot(self) -> IndexSnapshot:
+        """Return the current index; always warm once the first scan has run."""
+        return self._snapshot
+
+    def failure(self, key: str) -> Optional[str]:
+        """Return the ingestion error for a content hash, if it failed."""
+        return self.store.failure(key)
+
+    @property
+    def is_writer(self) -> bool:
+        """Whether this process scans the directory and publishes the index."""
+        return self.matrix_file is None or self._writer_lock is not None
+
+    def _try_become_writer(self) -> bool:
+        if self.is_writer:
+            return True
+        try:
+            import fcntl
+        except ImportError:
+            # No advisory locks on this platform; every process writes
+            self._writer_lock = True
+            return True
+
+        lock_file = open(self.matrix_file.root / "writer.lock", "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._writer_lock = lock_file
+        # Start from what the previous writer published instead of an empty index
+        self.refresh()
+        self._fill_ann(self._snapshot.keys, self._snapshot.matrix.vectors)
+        self._referenced = self._live_keys()
+        return True
+
+    def sync(self) -> bool:
+        """Scan the directory if this process is the writer, otherwise load the latest published index."""
+        if self._try_become_writer():
+            return self.scan()
+        return self.refresh()
+
+    def refresh(self) -> bool:
+        """Map the most recently published matrix if it is newer than the current snapshot."""
+        if self.matrix_file is None:
+            return False
+
+        with self._scan_lock:
+            version = self.matrix_file.version()
+            if version is None or version == self._snapshot.version:
+                self._reload_ann()
+                return False
+
+            loaded = self.matrix_file.load()
+            if loaded is None:
+                return False
+            version, files, keys, matrix, scales, members = loaded
+            self._load_imports()
+            members = [[(Path(file), key) for file, key in row] for row in members]
+            self._snapshot = self._make_snapshot(version, [Path(f) for f in files], keys, matrix, scales, members)
+            self._reload_ann()
+            return True
+
+    def _reload_ann(self) -> None:
+        """Load the ANN index again if the writer saved it since it was last loaded."""
+        if self.ann is None or self.ann.path is None:
+            return
+        try:
+            mtime = self.ann.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._ann_mtime:
+            self.ann.load(self.ann.path)
+            self._ann_mtime = mtime
+
+    def scan(self) -> bool:
+        """Bring the index up to date with the directory. Returns True if anything changed."""
+        with self._scan_lock:
+            self.resume_dir.mkdir(exist_ok=True)
+
+            files: Dict[Path, FileState] = {}
+            for pdf_file in sorted(self.resume_dir.glob("*.pdf")):
+                try:
+                    stat = pdf_file.stat()
+                except FileNotFoundError:
+                    continue
+
+                state = self._files.get(pdf_file)
+                if state is None or state.mtime != stat.st_mtime or state.size != stat.st_size:
+                    with open(pdf_file, "rb") as f:
+                        state = FileState(stat.st_mtime, stat.st_size, content_hash(f.read()))
+                files[pdf_file] = state
+
+            # Only content that is neither stored nor known to be broken is ingested
+            missing = {
+                state.key: pdf_file for pdf_file, state in files.items()
+                if state.key not in self.store and self.store.failure(state.key) is None
+            }
+            self._load_imports()
+            if self.near_duplicates is not None:
+                # Deleted files and the old content of edited ones are no duplicate targets
+                live = [state.key for state in files.values() if state.key in self.store]
+                live.extend(entry["key"] for entry in self._imported.values())
+                self.near_duplicates.retain({self.store.canonical(key) for key in live})
+            if missing:
+                self.ingest(missing)
+
+            current = {pdf_file: state.key for pdf_file, state in files.items() if state.key in self.store}
+            self._files = files
+            current.update((path, entry["key"]) for path, entry in self._imported.items())
+            # Files whose content is stored as a duplicate join the row of the entry holding its vector
+            groups: Dict[str, List[Tuple[Path, str]]] = {}
+            for path, key in current.items():
+                groups.setdefault(self.store.canonical(key), []).append((path, key))
+
+            # A matrix published with another vector dtype or grouping is rebuilt even if no file changed
+            unchanged = list(groups.keys()) == self._snapshot.keys and list(groups.values()) == self._snapshot.members
+            if unchanged and self._snapshot.matrix.matrix.dtype == np.dtype(self.vector_dtype):
+                self._fill_ann(self._snapshot.keys, self._snapshot.matrix.vectors)
+                self._prune()
+                return False
+
+            with timed("index_build"):
+                self._snapshot = self._build_snapshot(groups)
+            self._prune()
+            return True
+
+    def _live_keys(self) -> Set[str]:
+        """Return every content hash the corpus still refers to, including known-broken files."""
+        snapshot = self._snapshot
+        live = set(snapshot.keys)
+        live.update(key for row in snapshot.members for _, key in row)
+        live.update(state.key for state in self._files.values())
+        live.update(entry["key"] for entry in self._imported.values())
+        return live
+
+    def _prune(self) -> None:
+        """Delete the store entries of resumes that left the corpus since the last scan.
+
+        Only keys the index referred to before are removed, so entries another
+        process is still writing (e.g. a running bulk import) are never touched.
+        """
+        live = self._live_keys()
+        dead = self._referenced - live
+        if dead:
+            self.store.remove(dead)
+        self._referenced = live
+
+    def _fill_ann(self, keys: List[str], vectors: Callable[[np.ndarray], np.ndarray]) -> None:
+        """Insert every key the ANN index lacks, e.g. after enabling it or losing its file.
+
+        ``vectors`` returns the rows of ``keys`` at the given positions.
+        """
+        if self.ann is None:
+            return
+        # Deleted resumes may stay in the ANN index; they are skipped at query time
+        if self.ann.update(keys, vectors) and self.ann.path is not None:
+            self.ann.save(self.ann.path)
+            self._ann_mtime = self.ann.path.stat().st_mtime_ns
+
+    def _build_snapshot(self, groups: Dict[str, List[Tuple[Path, str]]]) -> IndexSnapshot:
+        keys = list(groups.keys())
+        members = list(groups.values())
+        paths = [row[0][0] for row in members]
+
+        # Reuse rows of the previous matrix; only new resumes are read from the store
+        previous = self._snapshot
+        kept = [i for i, key in enumerate(keys) if key in previous.rows_by_key]
+        new = [i for i, key in enumerate(keys) if key not in previous.rows_by_key]
+        matrix = np.empty((len(keys), self.hidden_size), dtype=np.float32)
+        if kept:
+            matrix[kept] = previous.matrix.vectors(np.array([previous.rows_by_key[keys[i]] for i in kept]))
+        if new:
+            matrix[new] = normalize_rows(np.stack([self.store.get(keys[i])[1] for i in new]))
+
+        # Readers reload the ANN index along with the matrix, so it must hold every row first
+        self._fill_ann(keys, lambda rows: matrix[rows])
+        matrix, scales = quantize_rows(matrix, self.vector_dtype)
+
+        version = previous.version + 1
+        if self.matrix_file is not None:
+            # Publish the matrix and serve it from the shared mapping rather than this private copy
+            version = max(version, (self.matrix_file.version() or 0) + 1)
+            self.matrix_file.write(
+                version, [str(pdf_file) for pdf_file in paths], keys, matrix, scales,
+                [[(str(path), key) for path, key in row] for row in members],
+            )
+            _, _, _, matrix, scales, _ = self.matrix_file.load()
+
+        return self._make_snapshot(version, paths, keys, matrix, scales, members)
+
+    def _load_imports(self) -> None:
+        for entry in self.manifest.read_new():
+            self._imported[Path(entry["file"])] = entry
+
+    def _make_snapshot(
+        self,
+        version: int,
+        paths: List[Path],
+        keys: List[str],
+        matrix: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+        members: Optional[List[List[Tuple[Path, str]]]] = None,
+    ) -> IndexSnapshot:
+        if members is None:
+            members = [[(path, key)] for path, key in zip(paths, keys)]
+
+        # Tokenise each resume once so skill matching never rescans its text;
+        # near-duplicates keep their own tokens since their skills may differ
+        member_keys = [list(dict.fromkeys(key for _, key in row)) for row in members]
+        self._tokens = {
+            key: self._tokens.get(key) or token_set(self.store.text(key) or "") for row in member_keys for key in row
+        }
+        member_tokens = [[(key, self._tokens[key]) for key in row] for row in member_keys]
+        tokens = [
+            row[0][1] if len(row) == 1 else frozenset().union(*(member for _, member in row)) for row in member_tokens
+        ]
+        # Term counts for BM25 are likewise kept per resume across snapshots
+        self._terms = {key: self._terms.get(key) or self.vocabulary.term_counts(self.store.text(key) or "") for key in keys}
+        if self.near_duplicates is not None and self.is_writer:
+            for key in keys:
+                if key not in self.near_duplicates:
+                    self.near_duplicates.add(key, self.store.text(key) or "")
+
+        # A row takes the category of its first bulk-imported member
+        categories = [
+            next((self._imported[path].get("category") for path, _ in row if path in self._imported), None)
+            for row in members
+        ]
+        rows_by_category: Dict[str, List[int]] = {}
+        for i, category in enumerate(categories):
+            if category:
+                rows_by_category.setdefault(category.lower(), []).append(i)
+
+        return IndexSnapshot(
+            version,
+            paths,
+            keys,
+            ResumeMatrix.from_normalized(keys, matrix, scales),
+            tokens,
+            TokenIndex(tokens),
+            {**{key: i for i, row in enumerate(members) for _, key in row}, **{key: i for i, key in enumerate(keys)}},
+            sorted((path.stem.lower(), path.name, i) for i, row in enumerate(members) for path, _ in row),
+            categories,
+            {category: np.array(rows, dtype=np.intp) for category, rows in rows_by_category.items()},
+            members,
+            BM25Index([self._terms[key] for key in keys], self.vocabulary),
+            member_tokens,
+        )
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Warning: Resume index scan failed: {e}")
+
+    def start(self) -> None:
+        """Start keeping the index up to date in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="resume-indexer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval)
+            self._thread = None
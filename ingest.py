@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+from pdfminer.high_level import extract_text
+
+from dedup import NearDuplicateIndex
+from embedding_store import EmbeddingStore
+from metrics import DOCUMENTS, record_stage, timed
+
+# Seconds a single PDF may spend in pdfminer before it is abandoned
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "60"))
+
+
+@dataclass
+class ExtractionResult:
+    """Outcome of extracting one PDF; exactly one of ``text`` and ``error`` is set.
+
+    ``transient`` marks errors of the pool rather than the document, which
+    are worth retrying on a later scan.
+    """
+    path: Path
+    key: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+    transient: bool = False
+
+
+def _on_timeout(signum, frame):
+    raise TimeoutError("PDF extraction timed out")
+
+
+def _extract_file(path: str, key: str, timeout: float) -> ExtractionResult:
+    """Extract text from one PDF inside a pool worker, enforcing the per-document timeout."""
+    # SIGALRM interrupts pdfminer inside this worker only; it is unavailable on Windows
+    use_alarm = timeout > 0 and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    start = time.perf_counter()
+    try:
+        return ExtractionResult(Path(path), key, text=extract_text(path), seconds=time.perf_counter() - start)
+    except Exception as e:
+        return ExtractionResult(Path(path), key, error=f"{type(e).__name__}: {e}", seconds=time.perf_counter() - start)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class ExtractionPool:
+    """Process pool that extracts PDF text across all available cores.
+
+    pdfminer is pure Python, so processes rather than threads are needed to
+    use more than one core. Workers are started with ``spawn`` so they never
+    inherit the parent's torch threads. A worker that dies breaks the whole
+    executor, so it is replaced and the unfinished documents are extracted
+    again one at a time, which pins any further crash on its own document.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: float = EXTRACT_TIMEOUT):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def extract(self, files: Dict[str, Path]) -> Iterator[ExtractionResult]:
+        """Extract text for ``{content_hash: path}``, yielding results as they finish."""
+        if not files:
+            return
+
+        remaining = dict(files)
+        isolate = False
+        while remaining:
+            executor = self._get_executor()
+            batch = dict([next(iter(remaining.items()))]) if isolate else remaining
+            futures = {
+                executor.submit(_extract_file, str(path), key, self.timeout): (key, path)
+                for key, path in batch.items()
+            }
+            try:
+                for future in as_completed(futures):
+                    key, path = futures[future]
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        result = ExtractionResult(Path(path), key, error=f"{type(e).__name__}: {e}", transient=True)
+                    del remaining[key]
+                    yield result
+            except BrokenProcessPool as e:
+                self.shutdown()
+                if isolate:
+                    # The document crashed a fresh worker on its own
+                    key, path = next(iter(batch.items()))
+                    del remaining[key]
+                    yield ExtractionResult(Path(path), key, error=f"Worker crashed: {e}")
+                else:
+                    print(f"Warning: Extraction worker crashed, retrying {len(remaining)} documents one at a time")
+                    isolate = True
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def ingest_pdfs(
+    files: Dict[str, Path],
+    pool: ExtractionPool,
+    store: EmbeddingStore,
+    encode: Callable[[List[str]], np.ndarray],
+    batch_size: int = 16,
+    near_duplicates: Optional[NearDuplicateIndex] = None,
+) -> Dict[str, str]:
+    """Extract, encode and store ``{content_hash: path}``, streaming into the store.
+
+    Extracted texts are encoded and written as soon as ``batch_size`` of them
+    are ready, so progress is kept even if a later document fails. Failed
+    documents are returned as ``{content_hash: error}`` and, unless the
+    error is transient, recorded in the store. Texts that ``near_duplicates`` matches to an
+    already encoded resume are stored as its duplicates without encoding.
+    """
+    failures = {}
+    pending: Dict[str, str] = {}
+    duplicates: List[tuple] = []
+
+    def flush():
+        if pending:
+            embeddings = encode(list(pending.values()))
+            with timed("store_write"):
+                for (key, text), embedding in zip(pending.items(), embeddings):
+                    store.put(key, text, embedding)
+            DOCUMENTS.inc(len(pending), event="encoded")
+            pending.clear()
+        # Written after the batch so a duplicate never names an entry that is not stored
+        for key, text, canonical in duplicates:
+            store.put_duplicate(key, text, canonical)
+        DOCUMENTS.inc(len(duplicates), event="duplicate")
+        duplicates.clear()
+
+    for result in pool.extract(files):
+        # Extraction runs in other processes, which report their time with the result
+        record_stage("extract", result.seconds)
+        DOCUMENTS.inc(event="extracted" if result.error is None else "failed")
+        if result.error is not None:
+            failures[result.key] = result.error
+            if not result.transient:
+                store.mark_failed(result.key, result.error)
+            print(f"Warning: Could not extract {result.path}: {result.error}")
+            continue
+
+        if near_duplicates is not None:
+            canonical = near_duplicates.find(result.text, pending)
+            if canonical is not None:
+                duplicates.append((result.key, result.text, canonical))
+                continue
+            near_duplicates.add(result.key, result.text)
+
+        pending[result.key] = result.text
+        if len(pending) >= batch_size:
+            flush()
+
+    flush()
+    return failures
@@ -0,0 +1,75 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from skills import tokenize
+
+# BM25 term-frequency saturation and document-length normalisation
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class Vocabulary:
+    """Growing map from tokens to column ids, shared by every snapshot of an index."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def term_counts(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(term ids, counts)`` for the tokens of a text, adding unseen tokens."""
+        ids, counts = np.unique(np.array([self._id(token) for token in tokenize(text)], dtype=np.int32), return_counts=True)
+        return ids, counts.astype(np.float32)
+
+    def lookup(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(term ids, counts)`` for the known tokens of a query; unknown tokens are dropped."""
+        known = [self._ids[token] for token in tokenize(text) if token in self._ids]
+        ids, counts = np.unique(np.array(known, dtype=np.int32), return_counts=True)
+        return ids, counts.astype(np.float32)
+
+    def _id(self, token: str) -> int:
+        term_id = self._ids.get(token)
+        if term_id is None:
+            with self._lock:
+                term_id = self._ids.setdefault(token, len(self._ids))
+        return term_id
+
+
+class BM25Index:
+    """Okapi BM25 scores of every resume for a free-text query.
+
+    Built from each row's ``(term ids, counts)``; the BM25 weight of every
+    (resume, term) pair is precomputed into a sparse column-major matrix, so
+    a query only touches the columns of its own terms.
+    """
+
+    def __init__(self, docs: List[Tuple[np.ndarray, np.ndarray]], vocabulary: Vocabulary):
+        self.vocabulary = vocabulary
+        n_terms = max(len(vocabulary), 1)
+        if not docs:
+            self._weights = sparse.csc_matrix((0, n_terms), dtype=np.float32)
+            return
+
+        lengths = np.array([counts.sum() for _, counts in docs], dtype=np.float32)
+        rows = np.repeat(np.arange(len(docs)), [len(ids) for ids, _ in docs])
+        columns = np.concatenate([ids for ids, _ in docs])
+        tf = np.concatenate([counts for _, counts in docs])
+
+        df = np.bincount(columns, minlength=n_terms)
+        idf = np.log1p((len(docs) - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(float(lengths.mean()), 1.0))
+        weights = idf[columns] * tf * (BM25_K1 + 1) / (tf + norm[rows])
+        self._weights = sparse.csc_matrix((weights, (rows, columns)), shape=(len(docs), n_terms))
+
+    def scores(self, query: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the BM25 score of every resume, or only of ``rows``, for a query."""
+        ids, counts = self.vocabulary.lookup(query)
+        # Terms first seen after this snapshot was built occur in none of its resumes
+        keep = ids < self._weights.shape[1]
+        scores = np.asarray(self._weights[:, ids[keep]] @ counts[keep]).ravel()
+        return scores if rows is None else scores[rows]
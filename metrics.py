@@ -0,0 +1,197 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) for stage and request duration histograms
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Upper bounds for inference batch size histograms
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# Per-request stage durations, set while a request asked for a timing breakdown
+_request_stages: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_stages", default=None)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge:
+    """Value read from a callback each time metrics are rendered."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], Dict[Tuple[str, ...], float]], labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._read = read
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._read().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative bucketed distribution of observations, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DURATION_BUCKETS, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # Per label set: [count per bucket..., count above the last bucket], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels[name]) for name in self.labelnames))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    """Set of metrics rendered together in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = DURATION_BUCKETS, labelnames: Tuple[str, ...] = ()) -> Histogram:
+        return self.register(Histogram(name, help, buckets, labelnames))
+
+    def gauge(self, name: str, help: str, read: Callable[[], Dict[Tuple[str, ...], float]], labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help, read, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Metrics are per process; with several uvicorn workers each one reports its own
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "resume_ranker_stage_seconds", "Time spent in each stage of the ingest and ranking pipeline.", labelnames=("stage",)
+)
+DOCUMENTS = REGISTRY.counter(
+    "resume_ranker_documents_total", "Documents handled, by what happened to them.", labelnames=("event",)
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "resume_ranker_cache_requests_total", "Cache lookups, by cache and hit or miss.", labelnames=("cache", "result")
+)
+INFERENCE_BATCH_SIZE = REGISTRY.histogram(
+    "resume_ranker_inference_batch_size", "Sequences per BERT forward pass.", buckets=BATCH_SIZE_BUCKETS
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "resume_ranker_http_requests_total", "HTTP requests, by route and status code.", labelnames=("method", "route", "status")
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "resume_ranker_http_request_seconds", "HTTP request latency until the response starts.", labelnames=("method", "route")
+)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Add a stage duration to the histogram and to the current request's breakdown, if one is collected."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str):
+    """Time the enclosed block as one occurrence of ``stage``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def collect_stages():
+    """Collect the stage durations recorded in this context (and work copied from it) into a dict."""
+    stages: Dict[str, float] = {}
+    token = _request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _request_stages.reset(token)
+
+
+def server_timing(stages: Dict[str, float]) -> str:
+    """Format stage durations as a ``Server-Timing`` header value in milliseconds."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in stages.items())
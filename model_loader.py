@@ -0,0 +1,57 @@
+import threading
+from typing import Optional, Tuple
+
+
+class LazyModel:
+    """Loads a tokenizer and model on first use instead of at import time.
+
+    ``cache_dir`` points transformers at a local model cache, and with
+    ``local_files_only`` the files are loaded from it without any network
+    lookup. ``name`` may also be a path to a directory saved with
+    ``save_pretrained``.
+
+    With ``quantize=True`` the model's linear layers are converted to dynamic
+    int8 quantisation after loading, which speeds up CPU inference at a small
+    cost in embedding accuracy.
+    """
+
+    def __init__(
+        self, name: str, cache_dir: Optional[str] = None, local_files_only: bool = False, quantize: bool = False
+    ):
+        self.name = name
+        self.cache_dir = cache_dir
+        self.local_files_only = local_files_only
+        self.quantize = quantize
+        self._tokenizer = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def hidden_size(self) -> int:
+        """Return the size of the model's embeddings, reading only its config."""
+        from transformers import AutoConfig
+
+        config = AutoConfig.from_pretrained(self.name, cache_dir=self.cache_dir, local_files_only=self.local_files_only)
+        return config.hidden_size
+
+    def load(self) -> Tuple[object, object]:
+        """Return ``(tokenizer, model)``, loading them once on the first call."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    # transformers is slow to import, so it is only imported when needed
+                    from transformers import AutoModel, AutoTokenizer
+
+                    kwargs = {"cache_dir": self.cache_dir, "local_files_only": self.local_files_only}
+                    self._tokenizer = AutoTokenizer.from_pretrained(self.name, **kwargs)
+                    model = AutoModel.from_pretrained(self.name, **kwargs)
+                    model.eval()
+                    if self.quantize:
+                        import torch
+
+                        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                    self._model = model
+        return self._tokenizer, self._model
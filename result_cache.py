@@ -0,0 +1,84 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+def normalize_field(value: str) -> str:
+    """Collapse runs of whitespace so cosmetic edits to a form field hit the same cache entry."""
+    return " ".join(str(value).split())
+
+
+def query_key(**fields) -> str:
+    """Return a stable hash of normalised request fields."""
+    normalized = {
+        name: normalize_field(value) if isinstance(value, str) else value
+        for name, value in fields.items()
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Bounded LRU cache of ranking results for one corpus version.
+
+    Entries expire ``ttl`` seconds after they are stored, and the least
+    recently used entry is evicted once ``max_entries`` are held. Every entry
+    belongs to the corpus version it was computed for; a lookup with a newer
+    version drops them all, so a ranking is never served after a resume has
+    been added, modified or deleted.
+    """
+
+    def __init__(self, max_entries: int = 64, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version: Optional[int] = None
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: int) -> bool:
+        # Called with the lock held; returns False for lookups older than the cache
+        if self.version is None or version > self.version:
+            self._entries.clear()
+            self.version = version
+        return version == self.version
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        """Return the cached value for a key at a corpus version, or None."""
+        if self.max_entries <= 0:
+            return None
+
+        with self._lock:
+            if not self._check_version(version):
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored, value = entry
+            if time.monotonic() - stored > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        """Store a value computed at a corpus version, evicting the least recently used entries."""
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            if not self._check_version(version):
+                return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,131 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Storage precisions for embedding vectors; int8 rows carry one float32 scale each
+VECTOR_DTYPES = ("float32", "float16", "int8")
+
+# Rows converted to float32 at a time when scoring a reduced-precision matrix
+SCORE_BLOCK_ROWS = 65536
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalise each row of a matrix, leaving all-zero rows as zeros."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize_rows(matrix: np.ndarray, dtype: str = "float32") -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Convert rows to a storage precision, returning ``(data, scales)``.
+
+    ``float32`` and ``float16`` are plain casts with ``scales=None``. ``int8``
+    scales each row symmetrically so its largest component maps to 127 and
+    returns the per-row float32 scales needed to undo it.
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unknown vector dtype {dtype!r}, expected one of {VECTOR_DTYPES}")
+
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype != "int8":
+        return matrix.astype(dtype), None
+
+    scales = np.abs(matrix).max(axis=-1, keepdims=True) / 127.0
+    scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+    data = np.clip(np.rint(matrix / scales), -127, 127).astype(np.int8)
+    return data, scales[..., 0]
+
+
+def dequantize_rows(data: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Inverse of ``quantize_rows``: return the rows as float32."""
+    matrix = np.asarray(data, dtype=np.float32)
+    if scales is not None:
+        matrix = matrix * np.asarray(scales, dtype=np.float32)[..., None]
+    return matrix
+
+
+class ResumeMatrix:
+    """Contiguous matrix of L2-normalised resume embeddings.
+
+    Row ``i`` holds the embedding for ``ids[i]``, so cosine similarity against
+    a query is a single matrix-vector product. The matrix may be stored as
+    float16 or int8 (with per-row ``scales``) to cut its memory; scores are
+    always computed in float32.
+    """
+
+    def __init__(self, ids: List[str], embeddings: np.ndarray, dtype: str = "float32"):
+        self.ids = list(ids)
+        matrix, self.scales = quantize_rows(normalize_rows(embeddings), dtype)
+        self.matrix = np.ascontiguousarray(matrix)
+
+    @classmethod
+    def from_normalized(cls, ids: List[str], matrix: np.ndarray, scales: Optional[np.ndarray] = None) -> "ResumeMatrix":
+        """Wrap an already-normalised matrix (e.g. a read-only memmap) without copying it."""
+        resume_matrix = cls.__new__(cls)
+        resume_matrix.ids = list(ids)
+        resume_matrix.matrix = matrix
+        resume_matrix.scales = scales
+        return resume_matrix
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def vectors(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return normalised rows as float32, whatever the storage precision."""
+        if rows is None:
+            return dequantize_rows(self.matrix, self.scales)
+        return dequantize_rows(self.matrix[rows], None if self.scales is None else self.scales[rows])
+
+    def similarities(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the cosine similarity to the query embedding of every resume, or only of ``rows``."""
+        query = normalize_rows(query.reshape(1, -1))[0]
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if matrix.dtype == np.float32:
+            return matrix @ query
+
+        # Upcast in blocks so a reduced-precision matrix is never copied whole to float32
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = matrix[start:start + SCORE_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query
+        if self.scales is not None:
+            scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+    def similarities_many(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return an (n_rows, n_queries) matrix of cosine similarities with a single matrix-matrix product."""
+        queries = normalize_rows(np.atleast_2d(queries)).T
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if matrix.dtype == np.float32:
+            return matrix @ queries
+
+        scores = np.empty((len(matrix), queries.shape[1]), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = matrix[start:start + SCORE_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ queries
+        if self.scales is not None:
+            scores *= (self.scales if rows is None else self.scales[rows])[:, None]
+        return scores
+
+
+def top_k_indices(scores: np.ndarray, top_k: Optional[int] = None, offset: int = 0) -> np.ndarray:
+    """Return indices of the highest scores, ranked ``offset`` to ``offset + top_k``.
+
+    Uses ``argpartition`` so only the requested page is fully sorted.
+    """
+    n = len(scores)
+    end = n if top_k is None else min(n, offset + top_k)
+    if offset >= end:
+        return np.empty(0, dtype=np.intp)
+
+    if end < n:
+        # Keep every score tied with the cut-off so ties rank the same as a full sort
+        threshold = scores[np.argpartition(-scores, end - 1)[end - 1]]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+
+    # Stable sort keeps equal scores in corpus order
+    ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return ranked[offset:end]
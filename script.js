@@ -47,6 +47,30 @@ document.head.appendChild(style);
 // Show/hide loading overlay
 function showLoading(show) {
     loadingOverlay.style.display = show ? 'flex' : 'none';
+    if (!show) {
+        setLoadingMessage('Analyzing resumes...');
+    }
+}
+
+function setLoadingMessage(message) {
+    loadingOverlay.querySelector('p').textContent = message;
+}
+
+// Call onEvent for every line of a newline-delimited JSON response as it arrives
+async function readEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+        if (done) {
+            break;
+        }
+    }
 }
 
 // DOM elements
@@ -170,18 +194,30 @@ async function startAnalysis() {
         formData.append('job_title', jobTitle);
         formData.append('job_description', jobDescription);
         formData.append('required_skills', requiredSkills);
+        formData.append('top_k', 20);
 
-        const response = await fetch('http://localhost:8001/rank-resumes', {
+        // Stream the ranking so provisional leaders show while the corpus is scored
+        const response = await fetch('http://localhost:8001/rank-resumes/stream', {
             method: 'POST',
             body: formData
         });
-
-        const data = await response.json();
-        if (data.error) {
-            throw new Error(data.error);
+        if (!response.ok) {
+            throw new Error(`Server responded with ${response.status}`);
         }
 
-        displayResults(data.results);
+        const results = [];
+        await readEvents(response, event => {
+            if (event.type === 'error') {
+                throw new Error(event.error);
+            } else if (event.type === 'progress') {
+                setLoadingMessage(`Scored ${event.processed} of ${event.candidates} resumes...`);
+                displayResults(event.top);
+            } else if (event.type === 'results') {
+                results.push(...event.results);
+            }
+        });
+
+        displayResults(results);
         showNotification('Analysis complete!', 'success');
     } catch (error) {
         console.error('Error during analysis:', error);
@@ -1,15 +1,34 @@
-from fastapi import FastAPI, UploadFile, Form
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pdfminer.high_level import extract_text
-from transformers import AutoTokenizer, AutoModel
+from pydantic import BaseModel, Field
 import torch
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 import json
-from typing import List
+from typing import List, Optional
+from functools import lru_cache
 import io
 import os
+import asyncio
+import bisect
+import threading
+import time
 from pathlib import Path
+from embedding_store import EmbeddingStore, MatrixFile
+from encoder import POOLING_MODES, encode_batch
+from scoring import VECTOR_DTYPES, top_k_indices
+from concurrency import BoundedExecutor, QueueFullError
+from ingest import ExtractionPool, ingest_pdfs
+from indexer import ResumeIndexer
+from uploads import IngestJobs, save_upload
+from model_loader import LazyModel
+from skills import MultiSkillMatcher, SkillMatcher
+from ann_index import make_ann_index
+from result_cache import ResultCache, query_key
+from dedup import NearDuplicateIndex
+from metrics import CACHE_REQUESTS, DOCUMENTS, HTTP_REQUESTS, HTTP_REQUEST_SECONDS, REGISTRY, collect_stages, server_timing, timed
 
 app = FastAPI()
 
@@ -20,28 +39,124 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Corpus-Version", "Server-Timing"],
 )
 
-# Load the BERT model and tokenizer
-model_name = "bert-base-uncased"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModel.from_pretrained(model_name)
+# The BERT model and tokenizer are loaded on first use, not at import time.
+# MODEL_CACHE_DIR points at a local model cache; with MODEL_LOCAL_ONLY=1 the
+# model is loaded from it without any network lookup.
+model_name = os.getenv("MODEL_NAME", "bert-base-uncased")
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR")
+MODEL_LOCAL_ONLY = os.getenv("MODEL_LOCAL_ONLY", "0") == "1"
+
+# "int8" runs BERT with dynamically quantised linear layers, which is faster
+# on CPU-only hosts; "float32" is the full-precision model
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "float32")
+if MODEL_PRECISION not in ("float32", "int8"):
+    raise ValueError(f"Unknown MODEL_PRECISION {MODEL_PRECISION!r}, expected 'float32' or 'int8'")
+bert = LazyModel(model_name, MODEL_CACHE_DIR, MODEL_LOCAL_ONLY, quantize=MODEL_PRECISION == "int8")
+
+# Size of the model's embeddings, read from its config without loading the weights
+EMBEDDING_DIM = bert.hidden_size()
 
 # Resume directory
 RESUME_DIR = Path("resumes")
 
+# Number of texts per BERT forward pass during bulk encoding
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", "16"))
+
+# Long texts are split into overlapping 512-token windows whose embeddings are
+# pooled ("mean" or "max"); "none" truncates at 512 tokens instead
+CHUNK_POOLING = os.getenv("CHUNK_POOLING", "mean")
+if CHUNK_POOLING not in POOLING_MODES + ("none",):
+    raise ValueError(f"Unknown CHUNK_POOLING {CHUNK_POOLING!r}, expected one of {POOLING_MODES + ('none',)}")
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "64"))
+
+# Ranking requests run at most RANK_WORKERS at a time, with RANK_QUEUE_SIZE more waiting
+RANK_WORKERS = int(os.getenv("RANK_WORKERS", "2"))
+RANK_QUEUE_SIZE = int(os.getenv("RANK_QUEUE_SIZE", "16"))
+rank_pool = BoundedExecutor(RANK_WORKERS, RANK_QUEUE_SIZE, name="rank")
+
+# PDF text extraction runs across a process pool sized to the available cores
+extraction_pool = ExtractionPool()
+
+# Uploaded batches are indexed one at a time in the background
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "64"))
+ingest_pool = BoundedExecutor(1, INGEST_QUEUE_SIZE, name="ingest")
+ingest_jobs = IngestJobs()
+
+# Seconds between background rescans of the resumes directory
+INDEX_POLL_INTERVAL = float(os.getenv("INDEX_POLL_INTERVAL", "5"))
+
+# Split torch's intra-op threads between ranking workers so they share the CPU,
+# unless TORCH_THREADS sets the count explicitly
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0")) or max(1, (os.cpu_count() or 1) // RANK_WORKERS)
+torch.set_num_threads(TORCH_THREADS)
+
+# Number of recent job-description embeddings kept in memory
+QUERY_CACHE_SIZE = 128
+
+# Precision of stored embedding vectors: "float32", "float16" (half the
+# memory) or "int8" (a quarter, with one scale per vector)
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")
+if VECTOR_DTYPE not in VECTOR_DTYPES:
+    raise ValueError(f"Unknown VECTOR_DTYPE {VECTOR_DTYPE!r}, expected one of {VECTOR_DTYPES}")
+
+# Extracted text and embeddings, keyed by resume content hash. Embeddings from
+# different encoder settings are not comparable, so each gets its own store.
+STORE_NAME = (
+    f"{Path(model_name).name}-{CHUNK_POOLING}"
+    + (f"-overlap{CHUNK_OVERLAP}" if CHUNK_POOLING != "none" else "")
+    + ("-int8" if MODEL_PRECISION == "int8" else "")
+)
+STORE_DIR = Path(".resume_index") / STORE_NAME
+# Resume texts held in memory for skill matching; beyond this many the least
+# recently used are read back from disk when needed (0 keeps every text)
+TEXT_CACHE_SIZE = int(os.getenv("TEXT_CACHE_SIZE", "10000"))
+store = EmbeddingStore(STORE_DIR, VECTOR_DTYPE, TEXT_CACHE_SIZE)
+
+# The corpus matrix is published to a flat file that every uvicorn worker
+# memory-maps, so the vectors are held once in the OS page cache
+matrix_file = MatrixFile(STORE_DIR)
+
+# A new resume whose word-shingle Jaccard similarity to an indexed one reaches
+# NEAR_DUPLICATE_THRESHOLD is stored as its duplicate: it is not encoded and
+# shares its ranking row. Byte-identical files always share one entry; 0
+# turns near-duplicate detection off. Resumes of different people built from
+# one template reach a similarity of about 0.93, so lower values can fold
+# distinct candidates into one result.
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.95"))
+near_duplicates = NearDuplicateIndex(store.text, NEAR_DUPLICATE_THRESHOLD) if NEAR_DUPLICATE_THRESHOLD > 0 else None
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """Encode many texts into an (N, 768) embedding matrix."""
+    tokenizer, model = bert.load()
+    pooling = None if CHUNK_POOLING == "none" else CHUNK_POOLING
+    return encode_batch(
+        texts, tokenizer, model, batch_size=ENCODE_BATCH_SIZE, pooling=pooling, chunk_overlap=CHUNK_OVERLAP
+    )
+
 def get_bert_embedding(text: str) -> np.ndarray:
     """Get BERT embeddings for a text."""
-    # Tokenize and prepare input
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512, padding=True)
-    
-    # Get model output
-    with torch.no_grad():
-        outputs = model(**inputs)
-    
-    # Use the [CLS] token embedding as the text embedding
-    embeddings = outputs.last_hidden_state[:, 0, :].numpy()
-    return embeddings[0]
+    return encode_texts([text])[0]
+
+# Set by _cached_query_embedding in the calling thread when it had to encode
+_query_cache_miss = threading.local()
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _cached_query_embedding(text: str) -> np.ndarray:
+    _query_cache_miss.value = True
+    embedding = get_bert_embedding(text)
+    embedding.setflags(write=False)
+    return embedding
+
+def get_query_embedding(text: str) -> np.ndarray:
+    """Get the BERT embedding for a job description, reusing recent results."""
+    _query_cache_miss.value = False
+    with timed("query_encode"):
+        embedding = _cached_query_embedding(text.strip())
+    CACHE_REQUESTS.inc(cache="query_embedding", result="miss" if _query_cache_miss.value else "hit")
+    return embedding
 
 def extract_text_from_pdf(pdf_file: bytes) -> str:
     """Extract text from a PDF file."""
@@ -51,86 +166,708 @@ def calculate_similarity(text1: str, text2: str) -> float:
     """Calculate similarity between two texts using BERT embeddings."""
     emb1 = get_bert_embedding(text1)
     emb2 = get_bert_embedding(text2)
-    
+
     # Reshape embeddings for cosine_similarity
     emb1 = emb1.reshape(1, -1)
     emb2 = emb2.reshape(1, -1)
-    
+
     return float(cosine_similarity(emb1, emb2)[0][0])
 
 def extract_skills(text: str, required_skills: List[str]) -> List[str]:
     """Extract matching skills from text."""
-    text = text.lower()
-    found_skills = []
-    
-    for skill in required_skills:
-        if skill.lower() in text:
-            found_skills.append(skill)
-    
-    return found_skills
+    return SkillMatcher(required_skills).match(text)
+
+def ingest_files(files: dict) -> dict:
+    """Extract, encode and store {content_hash: path}; returns {content_hash: error}."""
+    return ingest_pdfs(files, extraction_pool, store, encode_texts, ENCODE_BATCH_SIZE, near_duplicates)
+
+# Optional approximate nearest-neighbour index ("ivf", "hnsw" or "exact"),
+# persisted next to the embedding store. When enabled, unfiltered rankings
+# with a top_k only score the ANN_CANDIDATES resumes closest to the job
+# description.
+ANN_BACKEND = os.getenv("ANN_BACKEND", "none")
+ANN_CANDIDATES = int(os.getenv("ANN_CANDIDATES", "1000"))
+ann_index = None if ANN_BACKEND == "none" else make_ann_index(ANN_BACKEND, EMBEDDING_DIM, STORE_DIR)
+
+# Two-stage ranking: rank the skill-index shortlist by BM25 over the resume
+# text first and only pass the best LEXICAL_CANDIDATES to skill matching and
+# embedding similarity. 0 scores the whole shortlist; requests can override
+# it, and it does not apply when the ANN index shortlists instead.
+LEXICAL_CANDIDATES = int(os.getenv("LEXICAL_CANDIDATES", "0"))
+
+# Keeps a warm index of RESUME_DIR, re-ingesting only added or changed files
+indexer = ResumeIndexer(
+    RESUME_DIR, store, ingest_files, EMBEDDING_DIM, INDEX_POLL_INTERVAL, ann_index, matrix_file, VECTOR_DTYPE,
+    near_duplicates
+)
+
+def ingest_resumes():
+    """Bring the embedding store and index up to date with the resumes directory."""
+    indexer.sync()
+
+# Set once the model is loaded and the first index scan has finished
+ready = threading.Event()
+
+# Seconds to wait before retrying a failed warm-up
+WARM_UP_RETRY_DELAY = float(os.getenv("WARM_UP_RETRY_DELAY", "10"))
+
+def warm_up():
+    """Load the model and build the initial index."""
+    bert.load()
+    ingest_resumes()
+    ready.set()
+    indexer.start()
+
+async def run_warm_up():
+    # Retry until it succeeds so a transient failure does not leave the server unready for good
+    while True:
+        try:
+            await ingest_pool.run(warm_up)
+            return
+        except Exception as e:
+            print(f"Error: Warm-up failed, retrying in {WARM_UP_RETRY_DELAY:g}s: {e}")
+            await asyncio.sleep(WARM_UP_RETRY_DELAY)
+
+@app.on_event("startup")
+async def startup():
+    # Warm up in the background so the port opens immediately
+    app.state.warm_up = asyncio.create_task(run_warm_up())
+
+def require_ready():
+    """Reject a request with 503 until warm-up has finished."""
+    if not ready.is_set():
+        raise HTTPException(status_code=503, detail="Model and resume index are still loading")
+
+@app.get("/ready")
+async def readiness():
+    """Report whether the model is loaded and the resume index is warm."""
+    require_ready()
+    return {"status": "ready", "model": model_name, "resumes": len(indexer.snapshot().keys)}
+
+# Gauges read the current state whenever /metrics is scraped
+REGISTRY.gauge("resume_ranker_indexed_resumes", "Resumes in the current index snapshot.", lambda: {(): len(indexer.snapshot().keys)})
+REGISTRY.gauge(
+    "resume_ranker_pool_pending", "Jobs running or waiting on each worker pool.",
+    lambda: {("rank",): rank_pool.pending, ("ingest",): ingest_pool.pending}, labelnames=("pool",)
+)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count and time every request; with an X-Debug-Timing header, return its stage breakdown as Server-Timing."""
+    start = time.perf_counter()
+    if request.headers.get("x-debug-timing"):
+        with collect_stages() as stages:
+            response = await call_next(request)
+        stages["total"] = time.perf_counter() - start
+        response.headers["Server-Timing"] = server_timing(stages)
+    else:
+        response = await call_next(request)
+
+    # Label by route template so ids in the path do not create a series each
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, route=route)
+    return response
+
+@app.get("/metrics")
+async def metrics():
+    """Expose counters and timing histograms in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("shutdown")
+async def shutdown():
+    indexer.stop()
+    rank_pool.shutdown()
+    ingest_pool.shutdown()
+    extraction_pool.shutdown()
+
+# Resumes per /list-resumes page unless the client asks for another size
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "100"))
+LIST_MAX_PAGE_SIZE = 1000
 
 @app.get("/list-resumes")
-async def list_resumes():
-    """List all available resumes in the resumes directory."""
-    if not RESUME_DIR.exists():
-        RESUME_DIR.mkdir()
-        return {"resumes": []}
-    
-    resumes = []
-    for pdf_file in RESUME_DIR.glob("*.pdf"):
-        resumes.append({
-            "name": pdf_file.stem,
-            "file": str(pdf_file)
-        })
-    
-    return {"resumes": resumes}
+async def list_resumes(request: Request, cursor: Optional[str] = None, limit: int = LIST_PAGE_SIZE, prefix: str = ""):
+    """List indexed resumes in name order, a page at a time.
+
+    Served from the in-memory index. ``prefix`` keeps names starting with
+    it (case-insensitive); pass a response's ``next_cursor`` as ``cursor``
+    for the following page. The ETag changes with the corpus version, so a
+    client polling with If-None-Match gets 304 until a resume changes.
+    """
+    snapshot = indexer.snapshot()
+    etag = f'"{STORE_NAME}-{snapshot.version}"'
+    headers = {"ETag": etag, "X-Corpus-Version": str(snapshot.version), "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    # Names sharing the prefix form one contiguous range of the sorted listing
+    prefix = prefix.lower()
+    listing = snapshot.listing
+    start = bisect.bisect_left(listing, (prefix,))
+    end = bisect.bisect_left(listing, (prefix + "\U0010ffff",)) if prefix else len(listing)
+    total = end - start
+    if cursor:
+        start = max(start, bisect.bisect_right(listing, (Path(cursor).stem.lower(), cursor, len(listing))))
+
+    page = listing[start:min(end, start + max(1, min(limit, LIST_MAX_PAGE_SIZE)))]
+    # Duplicates share a row, so find the listed file among the row's members
+    resumes = [
+        {"name": Path(file_name).stem, "file": str(next(path for path, _ in snapshot.members[row] if path.name == file_name))}
+        for _, file_name, row in page
+    ]
+    next_cursor = page[-1][1] if page and start + len(page) < end else None
+
+    return JSONResponse({"resumes": resumes, "next_cursor": next_cursor, "total": total}, headers=headers)
+
+# Seconds an upload job waits for the writer process to index its files
+UPLOAD_INDEX_TIMEOUT = float(os.getenv("UPLOAD_INDEX_TIMEOUT", "600"))
+
+def index_upload_job(job_id: str):
+    """Index the files of an upload job and record the outcome for each one."""
+    ingest_jobs.update(job_id, status="processing")
+    pending = [file for file in ingest_jobs.get(job_id)["files"] if file["status"] == "queued"]
+
+    # Another worker may own the index; wait until it has picked the files up
+    deadline = time.monotonic() + UPLOAD_INDEX_TIMEOUT
+    while True:
+        ingest_resumes()
+        snapshot = indexer.snapshot()
+        for file in pending:
+            if file["id"] in snapshot.rows_by_key:
+                file["status"] = "indexed"
+            elif indexer.failure(file["id"]) is not None:
+                file["status"] = "failed"
+                file["error"] = indexer.failure(file["id"])
+        pending = [file for file in pending if file["status"] == "queued"]
+        if not pending or indexer.is_writer or time.monotonic() > deadline:
+            break
+        time.sleep(INDEX_POLL_INTERVAL)
+
+    for file in pending:
+        file["status"] = "failed"
+        if indexer.is_writer:
+            file["error"] = "Resume was removed before it could be indexed"
+        else:
+            file["error"] = "Timed out waiting for the resume to be indexed"
+
+    ingest_jobs.update(job_id, status="done")
+
+async def run_upload_job(job_id: str):
+    try:
+        await ingest_pool.run(index_upload_job, job_id)
+    except Exception as e:
+        ingest_jobs.update(job_id, status="failed", error=str(e))
+
+@app.post("/ingest")
+async def ingest_resumes_upload(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...)):
+    """Save uploaded PDFs into the resumes directory and index them in the background."""
+    saved = []
+    for upload in files:
+        if not upload.filename or not upload.filename.lower().endswith(".pdf"):
+            saved.append({"id": None, "name": upload.filename, "status": "rejected", "error": "Only PDF files are accepted"})
+            continue
+        
+        pdf_file, key = await save_upload(upload, RESUME_DIR)
+        saved.append({"id": key, "name": pdf_file.stem, "fileName": pdf_file.name, "status": "queued"})
+
+    job = ingest_jobs.create(saved)
+    background_tasks.add_task(run_upload_job, job["job_id"])
+    return job
+
+@app.get("/ingest/{job_id}")
+async def ingest_status(job_id: str):
+    """Report the indexing status of an upload job."""
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown ingest job")
+    return job
+
+def parse_skills(skills: str) -> List[str]:
+    """Split a comma-separated skills field into a list."""
+    return [s.strip() for s in skills.split(",") if s.strip()]
+
+def ann_limit(top_k: Optional[int], offset: int, min_skill_match: float, must_have: List[str], categories: List[str]) -> Optional[int]:
+    """Number of nearest resumes to shortlist from the ANN index, or None to use the skill index."""
+    # A request for every result must see the whole corpus, so it is never capped at ANN_CANDIDATES
+    if ann_index is None or top_k is None or min_skill_match or must_have or categories:
+        return None
+    return max(ANN_CANDIDATES, offset + top_k)
+
+def lexical_limit(lexical_candidates: Optional[int], limit: Optional[int]) -> int:
+    """Number of BM25 candidates passed on to scoring, or 0 to score the whole shortlist."""
+    if limit is not None:
+        return 0
+    return max(0, LEXICAL_CANDIDATES if lexical_candidates is None else lexical_candidates)
+
+def shortlist_rows(
+    snapshot,
+    job_embedding: np.ndarray,
+    skills_list: List[str],
+    limit: Optional[int],
+    min_skill_match: float,
+    must_have: List[str],
+    categories: List[str],
+    job_description: str = "",
+    lexical: int = 0
+) -> np.ndarray:
+    """Return the sorted rows of a snapshot worth scoring for a request."""
+    with timed("shortlist"):
+        if limit is not None:
+            # Shortlist the nearest resumes to the job description from the ANN index
+            hits = ann_index.search(job_embedding, limit, snapshot.matrix, snapshot.rows_by_key)
+            return np.array(sorted(snapshot.rows_by_key[key] for key, _ in hits if key in snapshot.rows_by_key), dtype=np.intp)
+        
+        # Shortlist candidates with set operations on the inverted skill index
+        rows = snapshot.token_index.shortlist(skills_list, min_skill_match / 100, must_have)
+        if categories:
+            # Only bulk-imported rows carry a category
+            in_categories = [snapshot.rows_by_category.get(category.lower(), np.empty(0, dtype=np.intp)) for category in categories]
+            rows = np.intersect1d(rows, np.concatenate(in_categories))
+        
+        if lexical and len(rows) > lexical:
+            # Keep the candidates whose text best matches the job description and skills
+            with timed("lexical"):
+                query = " ".join([job_description] + skills_list)
+                rows = np.sort(rows[top_k_indices(snapshot.lexical.scores(query, rows), lexical)])
+        return rows
+
+def row_skills(snapshot, row: int, matcher: SkillMatcher) -> List[str]:
+    """Return the skills found in a row, from whichever of its distinct resumes matches most."""
+    # A request still on an older snapshot may name an entry the writer has since pruned
+    return max((matcher.match(store.text(key) or "", tokens) for key, tokens in snapshot.member_tokens[row]), key=len)
+
+def row_skills_many(snapshot, row: int, matcher: MultiSkillMatcher) -> List[List[str]]:
+    """Return ``row_skills`` for every skill list of a ``MultiSkillMatcher`` in one pass."""
+    found = [matcher.match(store.text(key) or "", tokens) for key, tokens in snapshot.member_tokens[row]]
+    return [max(skills, key=len) for skills in zip(*found)]
+
+def skill_filter(skill_match: np.ndarray, min_skill_match: float, has_must_have: Optional[np.ndarray] = None) -> np.ndarray:
+    """Return which rows pass the minimum skill match and must-have filters."""
+    # The index may over-select multi-word skills, so apply the filters exactly
+    keep = skill_match >= min_skill_match / 100 - 1e-9
+    if has_must_have is not None:
+        keep &= has_must_have
+    return keep
+
+def combine_scores(similarity_scores: np.ndarray, skill_match: np.ndarray) -> np.ndarray:
+    """Return the final score of each row, a weighted average of similarity and skill match."""
+    return (similarity_scores * 0.7 + skill_match * 0.3) * 100
+
+def score_rows(snapshot, job_embedding: np.ndarray, rows: np.ndarray, skills_list: List[str], min_skill_match: float, must_have: List[str]):
+    """Filter and score shortlisted rows.
+
+    Returns ``(rows, skill_match, similarity_scores, final_scores)`` for the
+    rows that pass the skill filters.
+    """
+    DOCUMENTS.inc(len(rows), event="scored")
+
+    # Extract matching skills and calculate skill match percentage
+    with timed("skill_match"):
+        matcher = SkillMatcher(skills_list)
+        skill_match = np.array([
+            len(row_skills(snapshot, i, matcher)) / len(skills_list) if skills_list else 0
+            for i in rows
+        ])
+        
+        has_must_have = None
+        if must_have:
+            must_have_matcher = SkillMatcher(must_have)
+            has_must_have = np.array([
+                len(row_skills(snapshot, i, must_have_matcher)) == len(must_have)
+                for i in rows
+            ], dtype=bool)
+        keep = skill_filter(skill_match, min_skill_match, has_must_have)
+        rows = rows[keep]
+        skill_match = skill_match[keep]
+
+    # Score the shortlist with a single matrix-vector product
+    with timed("similarity"):
+        similarity_scores = snapshot.matrix.similarities(job_embedding, rows)
+
+    # Calculate final score (weighted average)
+    final_scores = combine_scores(similarity_scores, skill_match)
+    return rows, skill_match, similarity_scores, final_scores
+
+def format_results(snapshot, scored: tuple, skills_list: List[str], ranked: np.ndarray) -> List[dict]:
+    """Build response entries for the ``ranked`` positions of ``score_rows`` output."""
+    rows, skill_match, similarity_scores, final_scores = scored
+    matcher = SkillMatcher(skills_list)
+    results = []
+    with timed("format"):
+        for j in ranked:
+            pdf_file = snapshot.files[rows[j]]
+            results.append({
+                "name": pdf_file.stem,
+                "fileName": pdf_file.name,
+                "score": round(float(final_scores[j]), 2),
+                "skills": row_skills(snapshot, rows[j], matcher),
+                "similarity_score": round(float(similarity_scores[j]) * 100, 2),
+                "skill_match_percentage": round(float(skill_match[j]) * 100, 2),
+                "category": snapshot.categories[rows[j]],
+                # Other copies of this resume, collapsed into this result
+                "duplicates": [path.name for path, _ in snapshot.members[rows[j]][1:]]
+            })
+    return results
+
+# Scored candidates of recent queries, reused while a recruiter pages through
+# or re-runs the same search. Entries are dropped when the corpus changes.
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "64"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+
+def result_cache_key(
+    job_description: str,
+    skills_list: List[str],
+    min_skill_match: float,
+    must_have: List[str],
+    categories: List[str],
+    limit: Optional[int],
+    lexical: int = 0
+) -> str:
+    # The page itself is not part of the key; every page is cut from the same scores
+    return query_key(
+        job_description=job_description,
+        required_skills=",".join(skills_list),
+        min_skill_match=min_skill_match,
+        must_have_skills=",".join(must_have),
+        categories=",".join(sorted(category.lower() for category in categories)),
+        ann_limit=limit,
+        lexical=lexical,
+    )
+
+def scored_candidates(snapshot, job_description: str, skills_list: List[str], limit: Optional[int], min_skill_match: float, must_have: List[str], categories: List[str], lexical: int):
+    """Return ``(snapshot, score_rows output)`` for a query, from the result cache when possible."""
+    key = result_cache_key(job_description, skills_list, min_skill_match, must_have, categories, limit, lexical)
+    cached = result_cache.get(key, snapshot.version)
+    CACHE_REQUESTS.inc(cache="result", result="miss" if cached is None else "hit")
+    if cached is None:
+        # Encode the job description once for the whole request
+        job_embedding = get_query_embedding(job_description)
+        rows = shortlist_rows(snapshot, job_embedding, skills_list, limit, min_skill_match, must_have, categories, job_description, lexical)
+        cached = (snapshot, score_rows(snapshot, job_embedding, rows, skills_list, min_skill_match, must_have))
+        result_cache.put(key, snapshot.version, cached)
+    return cached
+
+def lexical_recall(scored: tuple, full: tuple, top_k: Optional[int], offset: int) -> float:
+    """Fraction of the full ranking's top ``offset + top_k`` rows that a two-stage ranking also ranks there."""
+    depth = None if top_k is None else offset + top_k
+    expected = full[0][top_k_indices(full[3], depth)]
+    found = scored[0][top_k_indices(scored[3], depth)]
+    return len(np.intersect1d(expected, found)) / len(expected) if len(expected) else 1.0
+
+def rank_resume_dir(
+    job_description: str,
+    required_skills: str,
+    top_k: Optional[int] = None,
+    offset: int = 0,
+    min_skill_match: float = 0.0,
+    must_have_skills: str = "",
+    categories: str = "",
+    lexical_candidates: Optional[int] = None,
+    report_recall: bool = False
+) -> dict:
+    """Rank every indexed resume against a job description.
+
+    min_skill_match (a percentage) and must_have_skills narrow the candidates
+    through the inverted skill index before any vector scoring; categories
+    keeps only bulk-imported rows with one of the given labels. With
+    lexical_candidates (default LEXICAL_CANDIDATES) only that many BM25 top
+    candidates are scored; report_recall then also ranks the full shortlist
+    and reports how much of its top results the two-stage ranking kept.
+    Scores are cached per query and corpus version, so later pages and
+    repeated searches skip encoding and scoring.
+    """
+    skills_list = parse_skills(required_skills)
+    must_have = parse_skills(must_have_skills)
+    category_list = parse_skills(categories)
+    limit = ann_limit(top_k, offset, min_skill_match, must_have, category_list)
+    lexical = lexical_limit(lexical_candidates, limit)
+
+    # Rank against the warm index; the background indexer handles new files
+    snapshot, scored = scored_candidates(
+        indexer.snapshot(), job_description, skills_list, limit, min_skill_match, must_have, category_list, lexical
+    )
+
+    # Only the requested page of top candidates is sorted
+    with timed("sort"):
+        ranked = top_k_indices(scored[3], top_k, offset)
+    response = {"results": format_results(snapshot, scored, skills_list, ranked), "total": len(scored[0])}
+    if report_recall:
+        _, full = scored_candidates(snapshot, job_description, skills_list, limit, min_skill_match, must_have, category_list, 0)
+        response["recall"] = {
+            "lexical_candidates": lexical,
+            "depth": len(full[0]) if top_k is None else min(offset + top_k, len(full[0])),
+            "recall": round(lexical_recall(scored, full, top_k, offset), 4),
+        }
+    return response
+
+# Rows scored between progress events of a streamed ranking, the number of
+# provisional leaders sent with each event when no top_k is given, and the
+# number of ranked results per final "results" event
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+STREAM_PREVIEW_SIZE = int(os.getenv("STREAM_PREVIEW_SIZE", "10"))
+STREAM_RESULTS_CHUNK = 100
+
+def rank_resume_dir_stream(
+    job_description: str,
+    required_skills: str,
+    top_k: Optional[int] = None,
+    offset: int = 0,
+    min_skill_match: float = 0.0,
+    must_have_skills: str = "",
+    categories: str = "",
+    lexical_candidates: Optional[int] = None
+):
+    """Rank like ``rank_resume_dir``, yielding events as batches of resumes are scored.
+
+    Yields a ``start`` event, a ``progress`` event with the provisional
+    leaders after each batch, then the requested page in ``results`` chunks
+    and a final ``done`` event. Only per-row scores are kept between
+    batches; result entries are built only for the rows that are sent. A
+    cached query skips straight to the results.
+    """
+    skills_list = parse_skills(required_skills)
+    must_have = parse_skills(must_have_skills)
+    category_list = parse_skills(categories)
+    limit = ann_limit(top_k, offset, min_skill_match, must_have, category_list)
+    lexical = lexical_limit(lexical_candidates, limit)
+    snapshot = indexer.snapshot()
+    key = result_cache_key(job_description, skills_list, min_skill_match, must_have, category_list, limit, lexical)
+    cached = result_cache.get(key, snapshot.version)
+    CACHE_REQUESTS.inc(cache="result", result="miss" if cached is None else "hit")
+
+    if cached is None:
+        job_embedding = get_query_embedding(job_description)
+        candidates = shortlist_rows(
+            snapshot, job_embedding, skills_list, limit, min_skill_match, must_have, category_list, job_description, lexical
+        )
+        yield {"type": "start", "candidates": len(candidates)}
+        
+        # Columns are (rows, skill_match, similarity_scores, final_scores)
+        empty = (np.empty(0, dtype=np.intp), np.empty(0), np.empty(0, dtype=np.float32), np.empty(0))
+        preview_size = offset + top_k if top_k is not None else STREAM_PREVIEW_SIZE
+        batches = []
+        leaders = empty
+        for start in range(0, len(candidates), STREAM_BATCH_SIZE):
+            batches.append(score_rows(
+                snapshot, job_embedding, candidates[start:start + STREAM_BATCH_SIZE], skills_list, min_skill_match, must_have
+            ))
+            
+            # Merge the batch into the running leaders instead of re-ranking everything scored so far
+            merged = tuple(np.concatenate([a, b]) for a, b in zip(leaders, batches[-1]))
+            leaders = tuple(column[top_k_indices(merged[3], preview_size)] for column in merged)
+            
+            yield {
+                "type": "progress",
+                "processed": min(start + STREAM_BATCH_SIZE, len(candidates)),
+                "candidates": len(candidates),
+                "matched": sum(len(batch[0]) for batch in batches),
+                "top": format_results(snapshot, leaders, skills_list, np.arange(len(leaders[0])))
+            }
+        
+        scored = tuple(np.concatenate([column] + [batch[i] for batch in batches]) for i, column in enumerate(empty))
+        cached = (snapshot, scored)
+        result_cache.put(key, snapshot.version, cached)
+    else:
+        yield {"type": "start", "candidates": len(cached[1][0])}
+    snapshot, scored = cached
+
+    # The final page is ranked over every scored row, exactly like rank_resume_dir
+    with timed("sort"):
+        ranked = top_k_indices(scored[3], top_k, offset)
+    for start in range(0, len(ranked), STREAM_RESULTS_CHUNK):
+        yield {"type": "results", "results": format_results(snapshot, scored, skills_list, ranked[start:start + STREAM_RESULTS_CHUNK])}
+    yield {"type": "done", "total": len(scored[0])}
 
 @app.post("/rank-resumes")
 async def rank_resumes(
     job_title: str = Form(...),
     job_description: str = Form(...),
-    required_skills: str = Form(...)
+    required_skills: str = Form(...),
+    top_k: Optional[int] = Form(None, ge=1),
+    offset: int = Form(0, ge=0),
+    min_skill_match: float = Form(0.0),
+    must_have_skills: str = Form(""),
+    categories: str = Form(""),
+    lexical_candidates: Optional[int] = Form(None),
+    report_recall: bool = Form(False)
 ):
+    require_ready()
     try:
-        results = []
-        skills_list = [s.strip() for s in required_skills.split(",") if s.strip()]
+        # File reads, PDF extraction and inference run on the ranking pool
+        return await rank_pool.run(
+            rank_resume_dir, job_description, required_skills, top_k, offset, min_skill_match, must_have_skills, categories,
+            lexical_candidates, report_recall
+        )
+
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Too many ranking requests in progress, try again shortly")
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@app.post("/rank-resumes/stream")
+async def rank_resumes_stream(
+    request: Request,
+    job_title: str = Form(...),
+    job_description: str = Form(...),
+    required_skills: str = Form(...),
+    top_k: Optional[int] = Form(None, ge=1),
+    offset: int = Form(0, ge=0),
+    min_skill_match: float = Form(0.0),
+    must_have_skills: str = Form(""),
+    categories: str = Form(""),
+    lexical_candidates: Optional[int] = Form(None)
+):
+    """Rank resumes, streaming progress and provisional leaders as batches are scored.
+
+    Responds with Server-Sent Events when the client accepts
+    ``text/event-stream`` and with newline-delimited JSON otherwise.
+    """
+    require_ready()
+    events = rank_pool.stream(
+        rank_resume_dir_stream, job_description, required_skills, top_k, offset, min_skill_match, must_have_skills, categories,
+        lexical_candidates
+    )
+    try:
+        # Take the first event here so a full queue or a bad request is still a plain HTTP error
+        first = await events.__anext__()
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Too many ranking requests in progress, try again shortly")
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    async def body():
+        event = first
+        try:
+            while True:
+                data = json.dumps(event)
+                yield f"event: {event['type']}\ndata: {data}\n\n" if sse else data + "\n"
+                event = await events.__anext__()
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            error = json.dumps({"type": "error", "error": str(e)})
+            yield f"event: error\ndata: {error}\n\n" if sse else error + "\n"
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(body(), media_type="text/event-stream" if sse else "application/x-ndjson")
+
+# Most job specs accepted by one batch ranking request
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "100"))
+
+class JobSpec(BaseModel):
+    job_title: str
+    job_description: str
+    required_skills: str
+    top_k: Optional[int] = Field(None, ge=1)
+    offset: int = Field(0, ge=0)
+    min_skill_match: float = 0.0
+    must_have_skills: str = ""
+    categories: str = ""
+    lexical_candidates: Optional[int] = None
+
+class BatchRankRequest(BaseModel):
+    jobs: List[JobSpec]
+
+def rank_resume_batch(jobs: List[JobSpec]) -> List[dict]:
+    """Rank every indexed resume against several jobs in one pass over the corpus.
+
+    Job descriptions are encoded in a single batch and scored against the
+    union of the jobs' shortlists with one matrix-matrix product. Each
+    resume is read and skill-matched once for all jobs together. Results
+    per job are the same as ``rank_resume_dir`` without an ANN shortlist,
+    and share its result cache.
+    """
+    snapshot = indexer.snapshot()
+    specs = []
+    for job in jobs:
+        skills_list = parse_skills(job.required_skills)
+        must_have = parse_skills(job.must_have_skills)
+        category_list = parse_skills(job.categories)
+        key = result_cache_key(
+            job.job_description, skills_list, job.min_skill_match, must_have, category_list, None,
+            lexical_limit(job.lexical_candidates, None)
+        )
+        cached = result_cache.get(key, snapshot.version)
+        CACHE_REQUESTS.inc(cache="result", result="miss" if cached is None else "hit")
+        specs.append((skills_list, must_have, category_list, key, cached))
+
+    missing = [i for i, spec in enumerate(specs) if spec[4] is None]
+    if missing:
+        # Encode every uncached job description in one batch
+        with timed("query_encode"):
+            job_embeddings = encode_texts([jobs[i].job_description.strip() for i in missing])
         
-        # Process all PDF files in the resumes directory
-        for pdf_file in RESUME_DIR.glob("*.pdf"):
-            # Read and process PDF
-            with open(pdf_file, "rb") as f:
-                pdf_content = f.read()
-            
-            resume_text = extract_text_from_pdf(pdf_content)
-            
-            # Calculate similarity score
-            similarity_score = calculate_similarity(resume_text, job_description)
-            
-            # Extract matching skills
-            matching_skills = extract_skills(resume_text, skills_list)
-            
-            # Calculate skill match percentage
-            skill_match = len(matching_skills) / len(skills_list) if skills_list else 0
+        shortlists = [
+            shortlist_rows(
+                snapshot, None, specs[i][0], None, jobs[i].min_skill_match, specs[i][1], specs[i][2],
+                jobs[i].job_description, lexical_limit(jobs[i].lexical_candidates, None)
+            )
+            for i in missing
+        ]
+        rows = np.unique(np.concatenate(shortlists)) if shortlists else np.empty(0, dtype=np.intp)
+        DOCUMENTS.inc(len(rows), event="scored")
+
+        # One skill-matching pass over each shortlisted resume covers the skills of every job
+        with timed("skill_match"):
+            lists = [specs[i][0] for i in missing] + [specs[i][1] for i in missing]
+            matcher = MultiSkillMatcher(lists)
+            found = [row_skills_many(snapshot, row, matcher) for row in rows]
+        
+        # Score the union of the shortlists against every job with a single matrix-matrix product
+        with timed("similarity"):
+            similarities = snapshot.matrix.similarities_many(job_embeddings, rows)
+
+        for j, (i, shortlist) in enumerate(zip(missing, shortlists)):
+            skills_list, must_have, _, key, _ = specs[i]
+            positions = np.searchsorted(rows, shortlist)
+            skill_match = np.array([len(found[p][j]) / len(skills_list) if skills_list else 0 for p in positions])
             
-            # Calculate final score (weighted average)
-            final_score = (similarity_score * 0.7 + skill_match * 0.3) * 100
+            has_must_have = None
+            if must_have:
+                has_must_have = np.array([len(found[p][len(missing) + j]) == len(must_have) for p in positions], dtype=bool)
+            keep = skill_filter(skill_match, jobs[i].min_skill_match, has_must_have)
+            positions = positions[keep]
+            similarity_scores = similarities[positions, j]
+            skill_match = skill_match[keep]
+            final_scores = combine_scores(similarity_scores, skill_match)
             
-            results.append({
-                "name": pdf_file.stem,
-                "fileName": pdf_file.name,
-                "score": round(final_score, 2),
-                "skills": matching_skills,
-                "similarity_score": round(similarity_score * 100, 2),
-                "skill_match_percentage": round(skill_match * 100, 2)
-            })
-        
-        # Sort results by score
-        results.sort(key=lambda x: x["score"], reverse=True)
-        
-        return {"results": results}
-    
+            cached = (snapshot, (rows[positions], skill_match, similarity_scores, final_scores))
+            result_cache.put(key, snapshot.version, cached)
+            specs[i] = specs[i][:4] + (cached,)
+
+    results = []
+    for job, (skills_list, _, _, _, (job_snapshot, scored)) in zip(jobs, specs):
+        with timed("sort"):
+            ranked = top_k_indices(scored[3], job.top_k, job.offset)
+        results.append({
+            "job_title": job.job_title,
+            "results": format_results(job_snapshot, scored, skills_list, ranked),
+            "total": len(scored[0])
+        })
+    return results
+
+@app.post("/rank-resumes/batch")
+async def rank_resumes_batch(request: BatchRankRequest):
+    """Rank resumes against many job specs at once, returning the results of each in request order."""
+    require_ready()
+    if not request.jobs:
+        raise HTTPException(status_code=400, detail="At least one job is required")
+    if len(request.jobs) > BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_JOBS} jobs can be ranked in one request")
+
+    try:
+        return {"jobs": await rank_pool.run(rank_resume_batch, request.jobs)}
+
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Too many ranking requests in progress, try again shortly")
     except Exception as e:
-        return {"error": str(e)}, 500
+        return JSONResponse({"error": str(e)}, status_code=500)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,151 @@
+import re
+import sys
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Optional, Set
+
+import numpy as np
+
+# A token is a run of letters/digits that may carry "+" or "#" (C++, C#) and
+# inner "." or "-" joins (node.js, asp.net, scikit-learn)
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+
+# Characters that count as part of a word when checking phrase boundaries
+_WORD = r"a-z0-9+#"
+
+# Separators inside a joined token
+_JOINS = re.compile(r"[.\-]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase skill tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def token_set(text: str) -> FrozenSet[str]:
+    """Return the distinct tokens of a text, interned so they are shared across resumes.
+
+    A joined token also contributes its parts, so "java-based" and "pl-sql"
+    still contain "java" and "sql" while "scikit-learn" matches as a whole.
+    """
+    tokens = set()
+    for token in tokenize(text):
+        tokens.add(token)
+        if "." in token or "-" in token:
+            tokens.update(part for part in _JOINS.split(token) if part)
+    return frozenset(sys.intern(token) for token in tokens)
+
+
+class SkillMatcher:
+    """Matches a list of required skills against resumes on whole-token boundaries.
+
+    Built once per request. Single-word skills are set lookups against the
+    resume's token set, so "Java" does not match "JavaScript" and "R" only
+    matches a standalone "R". Multi-word skills must have all their tokens
+    present before a precompiled phrase pattern confirms they are adjacent.
+    """
+
+    def __init__(self, required_skills: List[str]):
+        self.skills = list(required_skills)
+        self._terms = [tuple(tokenize(skill)) for skill in self.skills]
+        self._phrases = {
+            i: re.compile(
+                rf"(?<![{_WORD}])" + rf"[^{_WORD}]+".join(map(re.escape, terms)) + rf"(?![{_WORD}])"
+            )
+            for i, terms in enumerate(self._terms)
+            if len(terms) > 1
+        }
+
+    def match(self, text: str, tokens: Optional[FrozenSet[str]] = None) -> List[str]:
+        """Return the required skills found in a resume, in request order.
+
+        Pass the resume's precomputed ``token_set`` to avoid re-tokenising it.
+        """
+        if tokens is None:
+            tokens = token_set(text)
+
+        lowered = None
+        found = []
+        for i, (skill, terms) in enumerate(zip(self.skills, self._terms)):
+            if not terms or not all(term in tokens for term in terms):
+                continue
+            if i in self._phrases:
+                if lowered is None:
+                    lowered = text.lower()
+                if not self._phrases[i].search(lowered):
+                    continue
+            found.append(skill)
+
+        return found
+
+
+class MultiSkillMatcher:
+    """Matches the skill lists of several jobs against a resume in one pass.
+
+    Skills that appear in more than one list, in any spelling that tokenises
+    the same way, are only checked once per resume.
+    """
+
+    def __init__(self, skill_lists: List[List[str]]):
+        self.skill_lists = [list(skills) for skills in skill_lists]
+        self._terms = [[tuple(tokenize(skill)) for skill in skills] for skills in self.skill_lists]
+        distinct = list(dict.fromkeys(terms for terms in sum(self._terms, []) if terms))
+        self._matcher = SkillMatcher([" ".join(terms) for terms in distinct])
+        self._terms_of = dict(zip(self._matcher.skills, distinct))
+
+    def match(self, text: str, tokens: Optional[FrozenSet[str]] = None) -> List[List[str]]:
+        """Return the skills of each list found in a resume, in request order."""
+        found = {self._terms_of[skill] for skill in self._matcher.match(text, tokens)}
+        return [
+            [skill for skill, terms in zip(skills, term_list) if terms in found]
+            for skills, term_list in zip(self.skill_lists, self._terms)
+        ]
+
+
+class TokenIndex:
+    """Inverted index from skill tokens to the resume rows that contain them.
+
+    Used to shortlist candidates with set operations before the expensive
+    scoring path. Multi-word skills are looked up by their tokens, so the
+    shortlist may include rows where the tokens are not adjacent; the exact
+    ``SkillMatcher`` pass afterwards removes those.
+    """
+
+    def __init__(self, token_sets: List[FrozenSet[str]]):
+        postings: Dict[str, Set[int]] = defaultdict(set)
+        for row, tokens in enumerate(token_sets):
+            for token in tokens:
+                postings[token].add(row)
+        self.size = len(token_sets)
+        self._postings = dict(postings)
+
+    def rows_with(self, skill: str) -> Set[int]:
+        """Return the rows containing every token of a skill."""
+        terms = tokenize(skill)
+        if not terms:
+            return set()
+        rows = set(self._postings.get(terms[0], ()))
+        for term in terms[1:]:
+            rows &= self._postings.get(term, set())
+        return rows
+
+    def shortlist(self, required_skills: List[str], min_skill_match: float = 0.0, must_have: List[str] = ()) -> np.ndarray:
+        """Return sorted rows that can meet the skill filters.
+
+        ``min_skill_match`` is the fraction (0-1) of ``required_skills`` a
+        row must contain; ``must_have`` skills must all be present.
+        """
+        rows = None
+        for skill in must_have:
+            skill_rows = self.rows_with(skill)
+            rows = skill_rows if rows is None else rows & skill_rows
+
+        if min_skill_match > 0 and required_skills:
+            counts = np.zeros(self.size, dtype=np.int32)
+            for skill in required_skills:
+                counts[list(self.rows_with(skill))] += 1
+            matching = set(np.flatnonzero(counts >= min_skill_match * len(required_skills) - 1e-9).tolist())
+            rows = matching if rows is None else rows & matching
+
+        if rows is None:
+            return np.arange(self.size)
+        return np.array(sorted(rows), dtype=np.intp)
@@ -1,9 +1,25 @@
 import requests
 import os
+import time
+
+def upload_resumes(base_url, files):
+    # Upload the PDFs and wait until the server has indexed them
+    response = requests.post(f"{base_url}/ingest", files=files)
+    response.raise_for_status()
+    job = response.json()
+    
+    while job["status"] in ("queued", "processing"):
+        time.sleep(1)
+        job = requests.get(f"{base_url}/ingest/{job['job_id']}").json()
+    
+    for file in job["files"]:
+        if file["status"] != "indexed":
+            print(f"Warning: {file['name']} was not indexed: {file.get('error')}")
 
 def test_resume_ranking(resume_folder, job_title, job_description, required_skills):
     # Server endpoint
-    url = "http://localhost:8000/rank-resumes"
+    base_url = "http://localhost:8001"
+    url = f"{base_url}/rank-resumes"
     
     # Prepare the files
     files = []
@@ -22,13 +38,15 @@ def test_resume_ranking(resume_folder, job_title, job_description, required_skil
     }
     
     try:
-        # Send request
-        response = requests.post(url, files=files, data=data)
+        # Index the uploaded resumes, then rank the corpus
+        upload_resumes(base_url, files)
         
         # Close all opened files
         for file_tuple in files:
             file_tuple[1][1].close()
         
+        response = requests.post(url, data=data)
+        
         if response.status_code == 200:
             results = response.json()
             print("\n=== Resume Ranking Results ===")
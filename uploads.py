@@ -0,0 +1,81 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi import UploadFile
+
+# Bytes read from an upload per chunk while streaming it to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _unique_path(dest_dir: Path, file_name: str) -> Path:
+    """Return a path in dest_dir for file_name that does not overwrite an existing file."""
+    path = dest_dir / file_name
+    counter = 1
+    while path.exists():
+        path = dest_dir / f"{Path(file_name).stem}_{counter}{Path(file_name).suffix}"
+        counter += 1
+    return path
+
+
+async def save_upload(upload: UploadFile, dest_dir: Path) -> tuple:
+    """Stream an uploaded PDF into dest_dir chunk by chunk.
+
+    Returns ``(path, content_hash)``. The file is written under a ``.part``
+    name and renamed when complete, so the resume indexer never sees a
+    half-written PDF.
+    """
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest_dir / f".{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+
+    try:
+        with open(tmp_path, "wb") as f:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                f.write(chunk)
+
+        path = _unique_path(dest_dir, Path(upload.filename).name)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    return path, digest.hexdigest()
+
+
+class IngestJobs:
+    """In-memory registry of upload batches and the indexing status of each file."""
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def create(self, files: List[dict]) -> dict:
+        """Register a batch of saved files and return the new job."""
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "created": time.time(),
+            "files": files,
+        }
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+
+            # Forget the oldest jobs once the registry is full
+            while len(self._jobs) > self.max_jobs:
+                del self._jobs[next(iter(self._jobs))]
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._jobs.get(job_id)
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)